@@ -1,10 +1,19 @@
 import streamlit as st
 import pandas as pd
-import base64
-import os
-import requests
+import numpy as np
 import time
-from ships_data import SHIPS_DB
+import uuid
+from ships_data import CATALOG_VERSION, SHIPS_DB
+from images import (IMAGE_CACHE, build_asset_manifest, file_as_data_uri, get_thumbnail_data_uri, prefetch_thumbnails,
+                    static_thumbnail_url)
+from cart import Cart
+from catalog import SPEC_COLUMNS, CatalogIndex, build_ship_lookup, lookup_column
+from fleet_repo import FleetRepository
+from migrations import migrate
+from perf import PERF
+from save_queue import WriteBehindQueue
+from shared_db import SessionOverlay, SharedDB
+from storage import JSONBIN_URL as JSONBIN_API, ChangeSet, StorageBackend, copy_row, empty_db, make_backend, new_ship_ids
 
 # --- 1. CONFIGURATION ---
 st.set_page_config(
@@ -22,152 +31,281 @@ FLAGSHIPS_LIST = [
     "Pioneer", "Orion", "Reclaimer", "Arrastra", "Hull E", "Hull D", "BMM", "Merchantman", "Endeavor", "Odyssey"
 ]
 
-# --- 2. GESTION DATABASE (JSONBIN.IO) ---
+# Assurances proposées dans le hangar
+INSURANCE_OPTIONS = ["LTI", "10 Ans", "2 ans", "6 Mois", "2 Mois", "Standard"]
+
+# --- 2. GESTION DATABASE (JSONBIN.IO / SQLITE) ---
 # ID Correct (basé sur tes précédentes corrections)
 JSONBIN_ID = st.secrets.get("JSONBIN_ID", "6921f0ded0ea881f40f9433f")
 JSONBIN_KEY = st.secrets.get("JSONBIN_KEY", "")
+# API JSONBin (surchargeable pour pointer vers un serveur local) et compression gzip des envois
+JSONBIN_URL = st.secrets.get("JSONBIN_URL", JSONBIN_API)
+JSONBIN_GZIP = bool(st.secrets.get("JSONBIN_GZIP", False))
+# Encodage du document : "compact" (flotte en colonnes, cf. compact.py), "packed" (zlib + base85) ou "json"
+JSONBIN_ENCODING = st.secrets.get("JSONBIN_ENCODING", "compact")
+# Bin du flux de modifications (révision + derniers lots) relevé par les autres processus ; optionnel
+JSONBIN_FEED_ID = st.secrets.get("JSONBIN_FEED_ID", "")
+# Intervalle (s) de relevé du flux et de rafraîchissement du tableau NEED CREW
+LIVE_REFRESH_SECONDS = float(st.secrets.get("LIVE_REFRESH_SECONDS", 3))
+# Backend de stockage : "jsonbin" (document unique), "jsonbin-sharded" (un bin par pilote + manifeste
+# dans JSONBIN_ID) ou "sqlite" (WAL, écritures ligne à ligne)
+STORAGE_BACKEND = st.secrets.get("STORAGE_BACKEND", "jsonbin")
+SQLITE_PATH = st.secrets.get("SQLITE_PATH", "pioneer_fleet.db")
+# Visuels : "static" (URLs /app/static hachées, cf. .streamlit/config.toml) ou "inline" (data URI)
+IMAGE_MODE = st.secrets.get("IMAGE_MODE", "static")
+# Mode debug : vérifications coûteuses (agrégats recalculés à chaque rerun)
+DEBUG = bool(st.secrets.get("DEBUG", False))
+
+@st.cache_resource(show_spinner=False)
+def get_storage() -> StorageBackend:
+    """Backend de persistance choisi via `STORAGE_BACKEND` ("jsonbin" par défaut, ou "sqlite")."""
+    if STORAGE_BACKEND == "sqlite":
+        backend = make_backend("sqlite", path=SQLITE_PATH)
+        # Import initial depuis JSONBin si la base locale est vide
+        if backend.is_empty() and JSONBIN_KEY:
+            db = make_backend("jsonbin-sharded", bin_id=JSONBIN_ID, master_key=JSONBIN_KEY, base_url=JSONBIN_URL).load()
+            migrate(db)
+            backend.save(db)
+        return backend
+    kind = "jsonbin-sharded" if STORAGE_BACKEND == "jsonbin-sharded" else "jsonbin"
+    return make_backend(kind, bin_id=JSONBIN_ID, master_key=JSONBIN_KEY, base_url=JSONBIN_URL, gzip=JSONBIN_GZIP,
+                        feed_bin_id=JSONBIN_FEED_ID or None, encoding=JSONBIN_ENCODING)
 
-def normalize_db_schema(db: dict) -> dict:
-    """Normalise la structure de la DB."""
-    # Codes par défaut dans le JSON
-    db.setdefault("admin_code", "9999") 
-    db.setdefault("corpo_code", "APQ8M3")
-    
-    db.setdefault("users", {})
-    db.setdefault("fleet", [])
-    db.setdefault("user_data", {}) 
-
-    for i, ship in enumerate(db["fleet"]):
-        ship.setdefault("id", int(time.time() * 1_000_000) + i)
-        ship.setdefault("Propriétaire", "INCONNU")
-        ship.setdefault("Vaisseau", "Inconnu")
-        ship.setdefault("Marque", "N/A")
-        ship.setdefault("Rôle", "Inconnu")
-        
-        # MIGRATION: FlightReady remplace Dispo
-        ship.setdefault("FlightReady", False) 
-        if "Dispo" in ship:
-            ship["FlightReady"] = ship.pop("Dispo")
-            
-        ship.setdefault("Image", "")
-        ship.setdefault("Visuel", "")
-        ship.setdefault("Source", "STORE")
-        ship.setdefault("Prix_USD", 0.0)
-        ship.setdefault("Prix_aUEC", 0.0)
-        ship.setdefault("Assurance", "Standard")
-        ship.setdefault("Prix", None)
-        ship.setdefault("crew_max", 1)
-        
-        # AJOUTS: NeedCrew
-        ship.setdefault("NeedCrew", False)
-        ship.setdefault("CrewList", [])
-    
-    for pilot in db.get("users", {}).keys():
-        db["user_data"].setdefault(pilot, {"auec_balance": 0, "acquisition_target": None})
-    
+def load_db_from_cloud():
+    """DB lue sur le backend, migrée au schéma courant (résultat migré persisté une fois) ; DB vide hors ligne."""
+    PERF.count("db_cache_miss")
+    if not storage_online(): db = empty_db()
+    else: db = get_storage().load()
+    if migrate(db) and storage_online(): get_save_queue().submit(db, origin="migration")
     return db
 
-@st.cache_data(ttl=300, show_spinner="Chargement de la base de données...")
-def load_db_from_cloud():
-    if not JSONBIN_KEY:
-        st.warning("⚠️ Clé JSONBin.io manquante. Mode hors ligne.")
-        return {"users": {}, "fleet": [], "admin_code": "9999", "corpo_code": "APQ8M3"}
-    url = f"https://api.jsonbin.io/v3/b/{JSONBIN_ID}/latest"
-    headers = {"X-Master-Key": JSONBIN_KEY}
+@st.cache_resource(show_spinner=False)
+def get_shared_db() -> SharedDB:
+    """DB partagée par toutes les sessions du processus : une seule copie en mémoire, tenue à jour par le
+    flux de modifications du backend (sinon rechargée après 5 min)."""
+    storage = get_storage() if storage_online() else None
+    return SharedDB(load_db_from_cloud, max_age=300, feed=storage.changes_since if storage else None,
+                    poll_interval=LIVE_REFRESH_SECONDS, shard_loader=getattr(storage, "load_shard", None))
+
+@st.cache_resource(show_spinner=False)
+def get_save_queue() -> WriteBehindQueue:
+    """File d'écriture différée partagée par les sessions (vidée à l'arrêt du processus). Le document
+    envoyé est la DB partagée + les lots en attente ; chaque lot validé y est intégré."""
+    shared = get_shared_db()
+    return WriteBehindQueue(get_storage(), on_upload=lambda ms: PERF.record("upload", "file d'écriture", ms),
+                            base=shared.get, on_committed=shared.apply)
+
+def session_key() -> str:
+    if "session_key" not in st.session_state: st.session_state.session_key = uuid.uuid4().hex
+    return st.session_state.session_key
+
+def storage_online():
+    return STORAGE_BACKEND == "sqlite" or bool(JSONBIN_KEY)
+
+def save_db_to_cloud(data, changes: ChangeSet = None):
+    """Met en file la sauvegarde de `data` (avec `changes`, seul le lot de lignes modifiées est écrit
+    si le backend le permet). Rend la main immédiatement ; le résultat s'affiche au rerun suivant."""
+    if not storage_online(): return False
+    with PERF_RUN.span("save"):
+        get_save_queue().submit(data, changes, origin=session_key())
+    return True
+
+def show_save_status():
+    """Résultat du dernier envoi de la session et messages laissés par l'action précédente."""
+    status = get_save_queue().pop_status(session_key()) if storage_online() else None
+    if status is not None:
+        if status.state == "size_limit": st.warning("⚠️ Limite taille JSON atteinte.")
+        elif status.state == "error": st.error(f"Erreur Sauvegarde: {status.message}")
+        elif status.merged: st.toast("Sauvegarde fusionnée avec les modifications d'un autre membre.", icon="🔀")
+    for kind, message, icon in st.session_state.pop("flash", []):
+        if kind == "toast": st.toast(message, icon=icon)
+        elif kind == "success": st.success(message)
+        elif kind == "warning": st.warning(message)
+        elif kind == "balloons": st.balloons()
+
+def flash(kind, message="", icon=None):
+    """Message à afficher au prochain rerun (remplace les pauses avant `st.rerun`)."""
+    st.session_state.setdefault("flash", []).append((kind, message, icon))
+
+# Chronométrage du rerun (clos à la fin du script, cf. MAIN LOOP)
+PERF_RUN = PERF.begin(session_key())
+
+def session_db() -> dict:
+    """DB vue par la session : sa surcouche tant que ses sauvegardes sont en attente, sinon la DB partagée."""
+    overlay = st.session_state.get("db_overlay")
+    if overlay is not None and storage_online() and not get_save_queue().pending(session_key()):
+        # Sauvegardes validées (déjà intégrées à la DB partagée) ou refusées : la surcouche est abandonnée
+        del st.session_state["db_overlay"]
+        overlay = None
+    if overlay is not None: return overlay.db
+    shared = get_shared_db()
+    PERF.count("db_cache_call")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            return normalize_db_schema(response.json().get("record", {}))
+        if shared.db is not None:
+            # Lignes modifiées par les autres processus ; sans flux, rechargement complet périodique
+            if shared.sync() is None and shared.stale() and not get_save_queue().pending(): shared.reload()
+        return shared.get()
     except Exception as e:
         st.error(f"Erreur DB: {e}")
-    return {"users": {}, "fleet": [], "admin_code": "9999", "corpo_code": "APQ8M3"}
+    return shared.db if shared.db is not None else empty_db()
 
-def save_db_to_cloud(data):
-    if not JSONBIN_KEY: return False
-    url = f"https://api.jsonbin.io/v3/b/{JSONBIN_ID}"
-    headers = {"Content-Type": "application/json", "X-Master-Key": JSONBIN_KEY}
-    try:
-        response = requests.put(url, json=data, headers=headers, timeout=10)
-        if response.status_code in (200, 204): return True
-        if response.status_code == 403: 
-            st.warning("⚠️ Limite taille JSON atteinte.")
-            return True
-    except Exception as e:
-        st.error(f"Erreur Sauvegarde: {e}")
-    load_db_from_cloud.clear()
-    return False
+def writable_db() -> dict:
+    """Surcouche privée de la session, créée à la première écriture : à appeler avant toute modification."""
+    if "db_overlay" not in st.session_state:
+        st.session_state.db_overlay = SessionOverlay(get_shared_db())
+    st.session_state.db = st.session_state.db_overlay.db
+    return st.session_state.db
 
-# Session State DB
-if "db" not in st.session_state:
-    st.session_state.db = normalize_db_schema(load_db_from_cloud())
-else:
-    st.session_state.db = normalize_db_schema(st.session_state.db)
+# Session State DB : simple référence vers la DB partagée (migrée une fois au chargement) ou la surcouche
+if "db" not in st.session_state and not storage_online(): st.warning("⚠️ Clé JSONBin.io manquante. Mode hors ligne.")
+with PERF_RUN.span("load_db"): st.session_state.db = session_db()
 
 # --- 3. FONCTIONS UTILITAIRES & ACTIONS ---
 
-@st.cache_data(show_spinner=False)
-def get_local_img_as_base64(path):
-    if os.path.exists(path):
-        try:
-            with open(path, "rb") as f:
-                return f"data:image/png;base64,{base64.b64encode(f.read()).decode()}"
-        except: pass
-    return "" 
-
-def get_current_ship_price(ship_name, price_type):
-    info = SHIPS_DB.get(ship_name, {})
-    if price_type == 'USD':
-        return float(info.get('price', 0) or 0)
-    elif price_type == 'aUEC':
-        val = info.get('auec_price', 0)
-        return float(val) if isinstance(val, (int, float)) else 0.0
-    return 0.0
-
-def check_is_high_value(ship_name):
-    if ship_name in FLAGSHIPS_LIST: return True
-    usd_price = get_current_ship_price(ship_name, 'USD')
-    if usd_price >= 800: return True
-    return False
+@st.cache_resource(show_spinner="Préparation des visuels...")
+def get_asset_manifest():
+    """Manifeste construit au démarrage : `img` de chaque vaisseau -> existence + URLs statiques hachées
+    (fichiers complets ; miniatures publiées à la demande, en arrière-plan)."""
+    return build_asset_manifest([d.get("img", "") for d in SHIPS_DB.values()] + [BACKGROUND_IMAGE])
+
+def use_static_images():
+    return IMAGE_MODE == "static" and st.get_option("server.enableStaticServing")
+
+def get_img_src(path, height=None):
+    """Source d'image pour le HTML : URL statique (mise en cache navigateur) ou data URI en mode "inline"."""
+    if use_static_images():
+        entry = get_asset_manifest().get(path)
+        if entry is not None:
+            if not entry["exists"]: return ""
+            if not height: return entry["full"]
+            return static_thumbnail_url(get_asset_manifest(), path, height) or entry["full"]
+    if height: return get_thumbnail_data_uri(path, height)
+    uri = IMAGE_CACHE.get(("full", path))
+    if uri is None:
+        uri = file_as_data_uri(path)
+        if uri: IMAGE_CACHE.put(("full", path), uri)
+    return uri
+
+def prefetch_img_srcs(paths, height):
+    """Lance la préparation des miniatures sur le pool ; chemin -> future en mode "inline". En mode statique,
+    met en file leur publication (vide : la carte affiche le fichier complet en attendant)."""
+    if not use_static_images(): return prefetch_thumbnails(paths, height)
+    manifest = get_asset_manifest()
+    for path in dict.fromkeys(p for p in paths if p): static_thumbnail_url(manifest, path, height)
+    return {}
+
+@st.cache_resource(show_spinner=False)
+def get_ship_lookup():
+    """Table par modèle (prix numériques, statut amiral, libellés), construite une fois depuis SHIPS_DB."""
+    return build_ship_lookup(SHIPS_DB, FLAGSHIPS_LIST)
+
+def get_fleet_repo(write=False) -> FleetRepository:
+    """Index de la flotte : ceux de la DB partagée (lecture), ou ceux de la surcouche de la session."""
+    if write: writable_db()
+    overlay = st.session_state.get("db_overlay")
+    repo = overlay.repo if overlay is not None else get_shared_db().repo()
+    if DEBUG:
+        for err in repo.aggregates.verify(repo.rows): st.error(f"Agrégat incohérent : {err}")
+    return repo
 
 def update_ship_attributes(pilot, ship_name, source, old_ins, old_ready, old_need, new_ins, new_ready, new_need):
-    updated = False
-    for s in st.session_state.db["fleet"]:
-        if (s["Propriétaire"] == pilot and 
-            s["Vaisseau"] == ship_name and 
-            s["Source"] == source and 
-            s["Assurance"] == old_ins and
-            s.get("FlightReady", False) == old_ready and
-            s.get("NeedCrew", False) == old_need):
-            
-            s["Assurance"] = new_ins
-            s["FlightReady"] = bool(new_ready)
-            s["NeedCrew"] = bool(new_need)
-            updated = True
+    repo = get_fleet_repo(write=True)
+    changes = ChangeSet()
+    for ship_id in repo.ids_for_group((pilot, ship_name, source, old_ins, bool(old_ready), bool(old_need))):
+        changes.upsert_ship(repo.update(ship_id, Assurance=new_ins, FlightReady=bool(new_ready), NeedCrew=bool(new_need)))
     
-    if updated:
-        save_db_to_cloud(st.session_state.db)
-        st.toast("Vaisseau mis à jour !", icon="✅")
-        time.sleep(0.5)
+    if changes:
+        save_db_to_cloud(st.session_state.db, changes)
+        flash("toast", "Vaisseau mis à jour !", "✅")
         st.rerun()
 
 def toggle_crew_signup(ship_id, pilot_name, max_slots):
-    for s in st.session_state.db["fleet"]:
-        if s["id"] == ship_id:
-            current_crew = s.get("CrewList", [])
-            if pilot_name in current_crew:
-                s["CrewList"].remove(pilot_name)
-                st.toast("Vous avez quitté l'équipage.", icon="👋")
-            else:
-                if len(current_crew) < max_slots:
-                    s["CrewList"].append(pilot_name)
-                    st.toast("Bienvenue à bord !", icon="🚀")
-                else:
-                    st.error("Le vaisseau est complet !")
-                    return
-            save_db_to_cloud(st.session_state.db)
-            time.sleep(0.5)
-            st.rerun()
+    repo = get_fleet_repo(write=True)
+    s = repo.get(ship_id)
+    if s is None: return
+    current_crew = s.get("CrewList", [])
+    if pilot_name in current_crew:
+        s = repo.update(ship_id, CrewList=[m for m in current_crew if m != pilot_name])
+        flash("toast", "Vous avez quitté l'équipage.", "👋")
+    else:
+        if len(current_crew) < max_slots:
+            s = repo.update(ship_id, CrewList=current_crew + [pilot_name])
+            flash("toast", "Bienvenue à bord !", "🚀")
+        else:
+            st.error("Le vaisseau est complet !")
             return
+    save_db_to_cloud(st.session_state.db, ChangeSet().upsert_ship(s))
+    st.rerun()
+
+BATCH_FIELDS = ["Quantité", "Assurance", "FlightReady", "NeedCrew"]
+
+def end_hangar_batch():
+    """Abandonne la grille en cours (la suivante repart de la DB)."""
+    st.session_state.pop("hangar_batch_base", None)
+    st.session_state.pop("hangar_batch_grid", None)
+
+def hangar_batch_diff(base, edited):
+    """Positions des groupes modifiés dans la grille."""
+    edited = edited.assign(Quantité=edited["Quantité"].fillna(base["Quantité"]))
+    return list(base.index[(base[BATCH_FIELDS] != edited[BATCH_FIELDS]).any(axis=1)])
+
+def commit_hangar_batch(pilot, base, edited, changed):
+    """Un seul lot pour toute la grille : attributs, retraits et ajouts par groupe, via l'index des groupes.
+    Un groupe modifié ailleurs depuis l'ouverture de la grille n'est pas touché ; il est signalé et la grille
+    repart de la DB courante."""
+    repo = get_fleet_repo(write=True)
+    changes = ChangeSet()
+    skipped = []
+    for pos in changed:
+        old, new = base.loc[pos], edited.loc[pos]
+        ids = sorted(repo.ids_for_group((pilot, old["Vaisseau"], old["Source"], old["Assurance"], bool(old["FlightReady"]), bool(old["NeedCrew"]))))
+        if len(ids) != int(old["Quantité"]):
+            skipped.append(f"{old['Vaisseau']} ({old['Source']}, {old['Assurance']})")
+            continue
+        template = copy_row(repo.get(ids[0]))
+        target = int(new["Quantité"]) if pd.notna(new["Quantité"]) else len(ids)
+        fields = {"Assurance": new["Assurance"], "FlightReady": bool(new["FlightReady"]), "NeedCrew": bool(new["NeedCrew"])}
+        if target < len(ids):
+            # Retraits : d'abord les vaisseaux sans équipage inscrit
+            ids.sort(key=lambda i: not repo.get(i).get("CrewList"))
+            for ship_id in ids[target:]: changes.delete_ship(repo.remove(ship_id)["id"])
+            ids = ids[:target]
+        if any(template.get(k) != v for k, v in fields.items()):
+            for ship_id in ids: changes.upsert_ship(repo.update(ship_id, **fields))
+        for ship_id in new_ship_ids(max(0, target - len(ids)), repo):
+            changes.upsert_ship(repo.add({**template, **fields, "id": ship_id, "CrewList": []}))
+
+    end_hangar_batch()
+    if changes and save_db_to_cloud(st.session_state.db, changes):
+        flash("toast", f"✅ {len(changes.upserts) + len(changes.deletes)} vaisseaux mis à jour en un seul envoi !", "💾")
+    if skipped:
+        flash("warning", f"⚠️ Modifié ailleurs entre-temps, non enregistré : {', '.join(skipped)}. La grille a été rechargée, refaites ces modifications.")
+    st.rerun()
+
+def hangar_batch_editor(pilot, grp):
+    """Grille éditable de tous les groupes du hangar (sans filtre de recherche) : modifications gardées
+    localement jusqu'à VALIDER."""
+    if "hangar_batch_base" not in st.session_state:
+        st.session_state.hangar_batch_base = grp[["Vaisseau", "Source"] + BATCH_FIELDS].astype(
+            {"Vaisseau": str, "Source": str, "Quantité": int, "Assurance": str, "FlightReady": bool, "NeedCrew": bool}).reset_index(drop=True)
+    base = st.session_state.hangar_batch_base
+    edited = st.data_editor(
+        base, key="hangar_batch_grid", hide_index=True, num_rows="fixed", use_container_width=True,
+        disabled=["Vaisseau", "Source"],
+        column_config={
+            "Quantité": st.column_config.NumberColumn("Quantité", min_value=0, max_value=99, step=1, required=True),
+            "Assurance": st.column_config.SelectboxColumn("Assurance", options=INSURANCE_OPTIONS, required=True),
+            "FlightReady": st.column_config.CheckboxColumn("🚀 Flight Ready"),
+            "NeedCrew": st.column_config.CheckboxColumn("📢 Search Crew"),
+        })
+    changed = hangar_batch_diff(base, edited)
+    st.caption("Quantité à 0 : retire tout le groupe. Les retraits visent d'abord les vaisseaux sans équipage inscrit.")
+    c_ok, c_cancel = st.columns(2)
+    if c_ok.button(f"💾 VALIDER ({len(changed)} groupe{'s' if len(changed) > 1 else ''})", type="primary", disabled=not changed, use_container_width=True):
+        commit_hangar_batch(pilot, base, edited, changed)
+    if c_cancel.button("ANNULER", disabled=not changed, use_container_width=True):
+        end_hangar_batch()
+        st.rerun()
 
 def submit_cart_batch():
     if not st.session_state.current_pilot:
@@ -180,18 +318,11 @@ def submit_cart_batch():
     new_entries = []
     pilot = st.session_state.current_pilot
     
-    for item in st.session_state.cart:
-        ship_name = item['name']
-        source = item['source']
-        insurance = item['insurance']
-        
+    for (ship_name, source, insurance), qty in st.session_state.cart.items():
         info = SHIPS_DB.get(ship_name)
         if not info: continue
 
-        new_id = int(time.time() * 1_000_000) + len(new_entries)
-        
-        entry = {
-            "id": new_id,
+        template = {
             "Propriétaire": pilot,
             "Vaisseau": ship_name,
             "Marque": info.get("brand", "N/A"),
@@ -208,95 +339,101 @@ def submit_cart_batch():
             "Prix": None,
             "crew_max": info.get("crew_max", 1),
         }
-        new_entries.append(entry)
-
-    st.session_state.db["fleet"].extend(new_entries)
+        for _ in range(qty):
+            new_entries.append({**template, "CrewList": []})
+
+    repo = get_fleet_repo(write=True)
+    changes = ChangeSet()
+    # Ids aléatoires : pas de collision avec les ajouts faits au même instant par un autre processus
+    for entry, ship_id in zip(new_entries, new_ship_ids(len(new_entries), repo)):
+        changes.upsert_ship(repo.add({"id": ship_id, **entry}))
     
-    if save_db_to_cloud(st.session_state.db):
-        st.balloons()
-        st.toast(f"✅ {len(new_entries)} vaisseaux ajoutés au hangar !", icon="🚀")
-        st.session_state.cart = []
-        time.sleep(1)
+    if save_db_to_cloud(st.session_state.db, changes):
+        flash("balloons")
+        flash("toast", f"✅ {len(new_entries)} vaisseaux ajoutés au hangar !", "🚀")
+        st.session_state.cart.clear()
         st.rerun()
 
 # --- FONCTIONS ADMIN ---
 def admin_delete_user(target_pilot):
-    db = st.session_state.db
+    db = writable_db()
+    changes = ChangeSet().delete_user(target_pilot)
     if target_pilot in db["users"]: del db["users"][target_pilot]
     if target_pilot in db["user_data"]: del db["user_data"][target_pilot]
-    initial_len = len(db["fleet"])
-    db["fleet"] = [s for s in db["fleet"] if s["Propriétaire"] != target_pilot]
-    deleted = initial_len - len(db["fleet"])
+    repo = get_fleet_repo(write=True)
+    for s in repo.remove_owner(target_pilot): changes.delete_ship(s["id"])
+    deleted = len(changes.deletes)
     
-    for s in db["fleet"]:
-        if target_pilot in s.get("CrewList", []): s["CrewList"].remove(target_pilot)
+    for ship_id in repo.ids_for_crew(target_pilot):
+        s = repo.get(ship_id)
+        changes.upsert_ship(repo.update(ship_id, CrewList=[m for m in s["CrewList"] if m != target_pilot]))
         
-    if save_db_to_cloud(db):
-        st.success(f"Utilisateur {target_pilot} supprimé ({deleted} vaisseaux).")
-        time.sleep(2)
+    if save_db_to_cloud(db, changes):
+        flash("success", f"Utilisateur {target_pilot} supprimé ({deleted} vaisseaux).")
         st.rerun()
 
 # --- 4. CSS ---
-bg_img_code = get_local_img_as_base64(BACKGROUND_IMAGE)
-st.markdown(f"""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&family=Rajdhani:wght@500&display=swap');
-.stApp {{ background-image: url("{bg_img_code}"); background-size: cover; background-attachment: fixed; }}
-.stApp::before {{ content: ""; position: absolute; inset: 0; background: radial-gradient(circle at top left, rgba(0, 20, 40, 0.95), rgba(0, 0, 0, 0.98)); z-index: -1; }}
-section[data-testid="stSidebar"] {{ background-color: rgba(5, 10, 18, 0.98); border-right: 1px solid #123; }}
-
-/* POLICES CIBLÉES (Ne casse pas les tableaux) */
-h1, h2, h3, h4 {{ font-family: 'Orbitron', sans-serif !important; color: #fff !important; text-transform: uppercase; border-bottom: 2px solid rgba(0, 212, 255, 0.2); }}
-p, label, button, .stMarkdown, .stRadio {{ font-family: 'Rajdhani', sans-serif !important; }}
-
-/* LOCK SIDEBAR */
-section[data-testid="stSidebar"] button {{ display: none !important; }}
-[data-testid="collapsedControl"] {{ display: none !important; }}
-[data-testid="stSidebarCollapsedControl"] {{ display: none !important; }}
-
-::-webkit-scrollbar {{ width: 8px; }}
-::-webkit-scrollbar-track {{ background: #020408; }}
-::-webkit-scrollbar-thumb {{ background: #163347; border-radius: 4px; }}
-::-webkit-scrollbar-thumb:hover {{ background: #00d4ff; }}
-
-/* NAV */
-div[data-testid="stRadio"] > label {{ display: none; }}
-div[data-testid="stRadio"] div[role="radiogroup"] > label {{
-    background: rgba(255,255,255,0.05); padding: 10px; border-radius: 6px; border: 1px solid transparent; margin-bottom: 5px; transition: all 0.3s;
-}}
-div[data-testid="stRadio"] div[role="radiogroup"] > label:hover {{ border-color: #00d4ff; background: rgba(0, 212, 255, 0.1); }}
-div[data-testid="stRadio"] div[role="radiogroup"] > label[data-checked="true"] {{
-    background: linear-gradient(90deg, rgba(0, 212, 255, 0.2), transparent); border-left: 4px solid #00d4ff; color: #00d4ff !important;
-}}
-
-/* CARDS */
-.corpo-card {{
-    background: linear-gradient(135deg, rgba(4,20,35,0.95), rgba(0,0,0,0.95));
-    border: 1px solid #163347;
-    border-radius: 12px;
-    padding: 0;
-    overflow: hidden;
-    margin-bottom: 10px;
-    transition: transform 0.2s, box-shadow 0.2s;
-}}
-.corpo-card:hover {{ transform: translateY(-4px); border-color: #00d4ff; box-shadow: 0 0 15px rgba(0, 212, 255, 0.15); }}
-.corpo-card-img {{ width: 100%; height: 200px; object-fit: cover; border-bottom: 1px solid #163347; }} 
-.corpo-card-header {{ padding: 10px 14px; background: rgba(0,0,0,0.4); display:flex; justify-content:space-between; align-items:center; }}
-.corpo-card-title {{ font-family: 'Orbitron'; font-size: 1.2em; color: white; font-weight: bold; text-shadow: 0 2px 4px black; }}
-.corpo-card-count {{ background: #00d4ff; color: #000; padding: 4px 10px; border-radius: 6px; font-weight: bold; font-family: 'Orbitron'; box-shadow: 0 0 10px rgba(0,212,255,0.4); }}
-.corpo-card-body {{ padding: 12px 14px; font-size: 0.9em; color: #aaa; background: rgba(0,0,0,0.2); }}
-.corpo-pilot-tag {{ display: inline-block; background: rgba(22, 51, 71, 0.8); color: #e0e0e0; padding: 4px 8px; border-radius: 4px; margin: 3px; font-size: 0.85em; border: 1px solid rgba(255,255,255,0.1); }}
-
-.flagship-card {{ border: 2px solid #ffaa00; box-shadow: 0 0 25px rgba(255, 170, 0, 0.15); }}
-.flagship-card .corpo-card-img {{ height: 350px; }}
-.flagship-count {{ background: #ffaa00; }}
-
-.crew-card {{ border: 1px solid #ff0055 !important; box-shadow: 0 0 15px rgba(255, 0, 85, 0.2); }}
-.crew-tag {{ background: #ff0055; color: white; padding: 2px 6px; border-radius: 4px; font-size: 0.8em; font-weight: bold; margin-left: 5px; }}
-
-div[data-testid="stTextInput"] input {{ text-align: center; font-family: 'Orbitron'; border: 1px solid #333; background-color: #020408; }}
-div[data-testid="stSelectbox"] > div > div {{ background-color: rgba(0,0,0,0.5); border: 1px solid #333; }}
-</style>""", unsafe_allow_html=True)
+with PERF_RUN.span("css"):
+    bg_img_code = get_img_src(BACKGROUND_IMAGE)
+    st.markdown(f"""
+    <style>
+    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700&family=Rajdhani:wght@500&display=swap');
+    .stApp {{ background-image: url("{bg_img_code}"); background-size: cover; background-attachment: fixed; }}
+    .stApp::before {{ content: ""; position: absolute; inset: 0; background: radial-gradient(circle at top left, rgba(0, 20, 40, 0.95), rgba(0, 0, 0, 0.98)); z-index: -1; }}
+    section[data-testid="stSidebar"] {{ background-color: rgba(5, 10, 18, 0.98); border-right: 1px solid #123; }}
+
+    /* POLICES CIBLÉES (Ne casse pas les tableaux) */
+    h1, h2, h3, h4 {{ font-family: 'Orbitron', sans-serif !important; color: #fff !important; text-transform: uppercase; border-bottom: 2px solid rgba(0, 212, 255, 0.2); }}
+    p, label, button, .stMarkdown, .stRadio {{ font-family: 'Rajdhani', sans-serif !important; }}
+
+    /* LOCK SIDEBAR */
+    section[data-testid="stSidebar"] button {{ display: none !important; }}
+    [data-testid="collapsedControl"] {{ display: none !important; }}
+    [data-testid="stSidebarCollapsedControl"] {{ display: none !important; }}
+
+    ::-webkit-scrollbar {{ width: 8px; }}
+    ::-webkit-scrollbar-track {{ background: #020408; }}
+    ::-webkit-scrollbar-thumb {{ background: #163347; border-radius: 4px; }}
+    ::-webkit-scrollbar-thumb:hover {{ background: #00d4ff; }}
+
+    /* NAV */
+    div[data-testid="stRadio"] > label {{ display: none; }}
+    div[data-testid="stRadio"] div[role="radiogroup"] > label {{
+        background: rgba(255,255,255,0.05); padding: 10px; border-radius: 6px; border: 1px solid transparent; margin-bottom: 5px; transition: all 0.3s;
+    }}
+    div[data-testid="stRadio"] div[role="radiogroup"] > label:hover {{ border-color: #00d4ff; background: rgba(0, 212, 255, 0.1); }}
+    div[data-testid="stRadio"] div[role="radiogroup"] > label[data-checked="true"] {{
+        background: linear-gradient(90deg, rgba(0, 212, 255, 0.2), transparent); border-left: 4px solid #00d4ff; color: #00d4ff !important;
+    }}
+
+    /* CARDS */
+    .corpo-card {{
+        background: linear-gradient(135deg, rgba(4,20,35,0.95), rgba(0,0,0,0.95));
+        border: 1px solid #163347;
+        border-radius: 12px;
+        padding: 0;
+        overflow: hidden;
+        margin-bottom: 10px;
+        transition: transform 0.2s, box-shadow 0.2s;
+    }}
+    .corpo-card:hover {{ transform: translateY(-4px); border-color: #00d4ff; box-shadow: 0 0 15px rgba(0, 212, 255, 0.15); }}
+    .corpo-card-img {{ width: 100%; height: 200px; object-fit: cover; border-bottom: 1px solid #163347; }} 
+    .corpo-card-header {{ padding: 10px 14px; background: rgba(0,0,0,0.4); display:flex; justify-content:space-between; align-items:center; }}
+    .corpo-card-title {{ font-family: 'Orbitron'; font-size: 1.2em; color: white; font-weight: bold; text-shadow: 0 2px 4px black; }}
+    .corpo-card-count {{ background: #00d4ff; color: #000; padding: 4px 10px; border-radius: 6px; font-weight: bold; font-family: 'Orbitron'; box-shadow: 0 0 10px rgba(0,212,255,0.4); }}
+    .corpo-card-body {{ padding: 12px 14px; font-size: 0.9em; color: #aaa; background: rgba(0,0,0,0.2); }}
+    .corpo-pilot-tag {{ display: inline-block; background: rgba(22, 51, 71, 0.8); color: #e0e0e0; padding: 4px 8px; border-radius: 4px; margin: 3px; font-size: 0.85em; border: 1px solid rgba(255,255,255,0.1); }}
+
+    .flagship-card {{ border: 2px solid #ffaa00; box-shadow: 0 0 25px rgba(255, 170, 0, 0.15); }}
+    .flagship-card .corpo-card-img {{ height: 350px; }}
+    .flagship-count {{ background: #ffaa00; }}
+
+    .crew-card {{ border: 1px solid #ff0055 !important; box-shadow: 0 0 15px rgba(255, 0, 85, 0.2); }}
+    .crew-tag {{ background: #ff0055; color: white; padding: 2px 6px; border-radius: 4px; font-size: 0.8em; font-weight: bold; margin-left: 5px; }}
+
+    div[data-testid="stTextInput"] input {{ text-align: center; font-family: 'Orbitron'; border: 1px solid #333; background-color: #020408; }}
+    div[data-testid="stSelectbox"] > div > div {{ background-color: rgba(0,0,0,0.5); border: 1px solid #333; }}
+    </style>""", unsafe_allow_html=True)
 
 # --- 5. SESSION STATE ---
 if "current_pilot" not in st.session_state: st.session_state.current_pilot = None
@@ -304,7 +441,8 @@ if "catalog_page" not in st.session_state: st.session_state.catalog_page = 0
 if "menu_nav" not in st.session_state: st.session_state.menu_nav = "CATALOGUE"
 if "selected_source" not in st.session_state: st.session_state.selected_source = "STORE"
 if "selected_insurance" not in st.session_state: st.session_state.selected_insurance = "LTI"
-if "cart" not in st.session_state: st.session_state.cart = [] 
+if "cart" not in st.session_state: st.session_state.cart = Cart()
+elif isinstance(st.session_state.cart, list): st.session_state.cart = Cart.from_items(st.session_state.cart)
 if "admin_unlocked" not in st.session_state: st.session_state.admin_unlocked = False
 
 # --- 6. SIDEBAR ---
@@ -313,8 +451,9 @@ def render_sidebar():
         st.markdown("<h2 style='border:none;'>💠 PIONEER</h2>", unsafe_allow_html=True)
         if st.session_state.current_pilot:
             st.markdown(f"<div style='color:#00d4ff; font-weight:bold; margin-bottom:10px;'>PILOTE: {st.session_state.current_pilot}</div>", unsafe_allow_html=True)
+            if storage_online() and get_save_queue().pending(session_key()): st.caption("⏳ Sauvegarde en cours...")
             if st.button("DÉCONNEXION", use_container_width=True):
-                st.session_state.current_pilot = None; st.session_state.cart = []; st.session_state.admin_unlocked = False; st.rerun()
+                st.session_state.current_pilot = None; st.session_state.cart.clear(); st.session_state.admin_unlocked = False; st.rerun()
             st.markdown("---")
             
             nav_opts = ["CATALOGUE", "MON HANGAR", "FLOTTE CORPO", "NEED CREW", "ADMINISTRATION"]
@@ -352,11 +491,55 @@ def home_page():
                     if pseudo in users and users[pseudo] != pin: st.error("PIN incorrect.")
                     else:
                         if pseudo not in users:
+                            users = writable_db()["users"]
                             users[pseudo] = pin
-                            save_db_to_cloud(st.session_state.db)
+                            st.session_state.db["user_data"].setdefault(pseudo, {"auec_balance": 0, "acquisition_target": None})
+                            save_db_to_cloud(st.session_state.db, ChangeSet().set_user(pseudo, pin).set_user_data(pseudo, st.session_state.db["user_data"][pseudo]))
                         st.session_state.current_pilot = pseudo
                         st.rerun()
 
+@st.cache_resource(show_spinner=False)
+def get_catalog_index(catalog_version):
+    """Index de facettes du catalogue, construit une fois par version du catalogue."""
+    return CatalogIndex(SHIPS_DB)
+
+def _facet_value(value):
+    return None if value in (None, "Tous") else value
+
+def _spec_columns(source):
+    """Caractéristiques filtrables ; le prix suit la source sélectionnée."""
+    return [c for c in SPEC_COLUMNS if c != ("auec" if source == "STORE" else "price")]
+
+def _active_ranges(cat_index, source):
+    """Plages des curseurs réellement restreintes (un curseur à fond n'exclut pas les valeurs inconnues)."""
+    ranges = {}
+    for col in _spec_columns(source):
+        value, bounds = st.session_state.get(f"cat_rng_{col}"), cat_index.bounds(col)
+        if value and bounds and (value[0] > bounds[0] or value[1] < bounds[1]): ranges[col] = tuple(value)
+    return ranges
+
+def catalogue_card_html(name, data, img_src, p_source, owned=None):
+    """Carte du catalogue ; sans `img_src`, le cadre image reste vide (squelette). `owned` : totaux du
+    modèle dans la flotte corpo (`FleetAggregates.model`)."""
+    count_in_cart = st.session_state.cart.count(name)
+    border = "2px solid #00d4ff" if count_in_cart > 0 else "1px solid #163347"
+    shadow = "0 0 15px rgba(0, 212, 255, 0.4)" if count_in_cart > 0 else "none"
+    opacity = "1.0"
+
+    if p_source == "STORE":
+        pv = data.get('price', 0)
+        price_str = f"${pv:,.0f} USD" if isinstance(pv, (int, float)) else str(pv)
+        price_col = "#00d4ff"
+    else:
+        pv = data.get('auec_price', 0)
+        price_str = f"{pv:,.0f} aUEC" if isinstance(pv, (int, float)) and pv > 0 else "N/A"
+        price_col = "#30e8ff"
+
+    img_html = f"<img src='{img_src}' loading='lazy' decoding='async' style='width:100%; height:100%; object-fit:cover; opacity:{opacity}'>" if img_src else ""
+    badge_html = f"<div style='background:#00d4ff; color:black; font-weight:bold; padding:0 6px; border-radius:4px;'>x{count_in_cart}</div>" if count_in_cart > 0 else ""
+    owned_html = f"<div style='font-size:0.8em; color:#8aa; margin-top:4px;'>🏢 {owned['count']} dans la corpo • {owned['ready']} Flight Ready</div>" if owned and owned["count"] else ""
+    return f"<div style='background:#041623; border-radius:8px; border:{border}; box-shadow:{shadow}; overflow:hidden; margin-bottom:8px; transition:0.2s;'><div style='height:150px; background:#000;'>{img_html}</div><div style='padding:10px;'><div style='display:flex; justify-content:space-between; align-items:center;'><div style='font-weight:bold; color:#fff; font-size:1.1em;'>{name}</div>{badge_html}</div><div style='display:flex; justify-content:space-between; font-size:0.9em; color:#ccc; margin-top:4px;'><span>{data.get('role','N/A')}</span><span style='color:{price_col}; font-weight:bold;'>{price_str}</span></div>{owned_html}</div></div>"
+
 def catalogue_page():
     col_filters, col_main, col_cart = st.columns([1, 3.5, 1.5])
     with col_filters:
@@ -365,22 +548,34 @@ def catalogue_page():
         st.session_state.selected_source = p_source
         p_ins = st.selectbox("ASSURANCE", ["LTI", "10 Ans", "2 ans", "6 Mois", "2 Mois", "Standard"], index=0)
         st.markdown("---")
-        brands = ["Tous"] + sorted(list(set(d.get("brand") for d in SHIPS_DB.values() if d.get("brand"))))
-        f_brand = st.selectbox("CONSTRUCTEUR", brands)
-        all_roles = sorted(list(set(d.get("role", "Inconnu") for d in SHIPS_DB.values() if d.get("role"))))
-        f_role = st.selectbox("RÔLE", ["Tous"] + all_roles)
+        # Comptes par facette selon les autres filtres (valeurs du rerun précédent)
+        cat_index = get_catalog_index(CATALOG_VERSION)
+        cur_brand = _facet_value(st.session_state.get("cat_brand"))
+        cur_role = _facet_value(st.session_state.get("cat_role"))
+        cur_search = st.session_state.get("cat_search") or None
+        cur_ranges = _active_ranges(cat_index, p_source)
+        brand_counts = cat_index.counts("brand", role=cur_role, names=cur_search, ranges=cur_ranges)
+        role_counts = cat_index.counts("role", brand=cur_brand, names=cur_search, ranges=cur_ranges)
+        f_brand = st.selectbox("CONSTRUCTEUR", ["Tous"] + cat_index.brands, key="cat_brand",
+                               format_func=lambda b: b if b == "Tous" else f"{b} ({brand_counts.get(b, 0)})")
+        f_role = st.selectbox("RÔLE", ["Tous"] + cat_index.roles, key="cat_role",
+                              format_func=lambda r: r if r == "Tous" else f"{r} ({role_counts.get(r, 0)})")
+        spec_cols = _spec_columns(p_source)
+        f_sort = st.selectbox("TRI", [None] + spec_cols, key="cat_sort",
+                              format_func=lambda c: "Catalogue" if c is None else SPEC_COLUMNS[c][1])
+        f_desc = st.toggle("Décroissant", key="cat_desc", disabled=f_sort is None)
+        with st.expander("CARACTÉRISTIQUES"):
+            for col in spec_cols:
+                bounds = cat_index.bounds(col)
+                if bounds and bounds[0] < bounds[1]:
+                    lo, hi = float(np.floor(bounds[0])), float(np.ceil(bounds[1]))
+                    st.slider(SPEC_COLUMNS[col][1], lo, hi, (lo, hi), key=f"cat_rng_{col}")
+        ranges = _active_ranges(cat_index, p_source)
         
     with col_main:
         st.subheader(f"REGISTRE ({len(st.session_state.cart)} SÉLECTIONNÉS)")
-        search = st.multiselect("RECHERCHE", sorted(list(SHIPS_DB.keys())), placeholder="🔍 Vaisseau...", label_visibility="collapsed")
-        filtered = {}
-        for name, data in SHIPS_DB.items():
-            if f_brand != "Tous" and data.get("brand") != f_brand: continue
-            if f_role != "Tous" and data.get("role") != f_role: continue
-            if search and name not in search: continue
-            filtered[name] = data
-
-        items = list(filtered.items())
+        search = st.multiselect("RECHERCHE", cat_index.sorted_names, key="cat_search", placeholder="🔍 Vaisseau...", label_visibility="collapsed")
+        items = [(name, SHIPS_DB[name]) for name in cat_index.filter(_facet_value(f_brand), _facet_value(f_role), search, ranges, f_sort, f_desc)]
         PER_PAGE = 8
         total_pages = max(1, (len(items) + PER_PAGE - 1) // PER_PAGE)
         if st.session_state.catalog_page >= total_pages: st.session_state.catalog_page = 0
@@ -395,42 +590,34 @@ def catalogue_page():
         
         if not current_batch: st.info("Aucun vaisseau.")
         
+        # Images de la page (et des pages voisines, pour le cache) préparées en arrière-plan
+        pending = prefetch_img_srcs([d.get("img", "") for _, d in current_batch], 150)
+        prefetch_img_srcs([d.get("img", "") for _, d in items[max(0, start - PER_PAGE):start] + items[start + PER_PAGE:start + 2 * PER_PAGE]], 150)
+
+        # 1) Cartes et boutons rendus immédiatement (squelette si l'image est en cours), 2) images insérées dès qu'elles sont prêtes
+        fleet_totals = get_fleet_repo().aggregates
         cols = st.columns(2)
+        slots = []
         for i, (name, data) in enumerate(current_batch):
             with cols[i % 2]:
-                img_b64 = get_local_img_as_base64(data.get("img", ""))
-                count_in_cart = sum(1 for item in st.session_state.cart if item['name'] == name)
-                border = "2px solid #00d4ff" if count_in_cart > 0 else "1px solid #163347"
-                shadow = "0 0 15px rgba(0, 212, 255, 0.4)" if count_in_cart > 0 else "none"
-                opacity = "1.0"
-
-                if p_source == "STORE":
-                    pv = data.get('price', 0)
-                    price_str = f"${pv:,.0f} USD" if isinstance(pv, (int, float)) else str(pv)
-                    price_col = "#00d4ff"
-                else:
-                    pv = data.get('auec_price', 0)
-                    price_str = f"{pv:,.0f} aUEC" if isinstance(pv, (int, float)) and pv > 0 else "N/A"
-                    price_col = "#30e8ff"
-
-                badge_html = f"<div style='background:#00d4ff; color:black; font-weight:bold; padding:0 6px; border-radius:4px;'>x{count_in_cart}</div>" if count_in_cart > 0 else ""
-                card_html = f"<div style='background:#041623; border-radius:8px; border:{border}; box-shadow:{shadow}; overflow:hidden; margin-bottom:8px; transition:0.2s;'><div style='height:150px; background:#000;'><img src='{img_b64}' style='width:100%; height:100%; object-fit:cover; opacity:{opacity}'></div><div style='padding:10px;'><div style='display:flex; justify-content:space-between; align-items:center;'><div style='font-weight:bold; color:#fff; font-size:1.1em;'>{name}</div>{badge_html}</div><div style='display:flex; justify-content:space-between; font-size:0.9em; color:#ccc; margin-top:4px;'><span>{data.get('role','N/A')}</span><span style='color:{price_col}; font-weight:bold;'>{price_str}</span></div></div></div>"
-                st.markdown(card_html, unsafe_allow_html=True)
+                path = data.get("img", "")
+                slot = st.empty()
+                slot.markdown(catalogue_card_html(name, data, "" if path in pending else get_img_src(path, 150), p_source, fleet_totals.model(name)), unsafe_allow_html=True)
+                if path in pending: slots.append((slot, name, data, pending[path]))
 
                 # --- BOUTONS + / - RESTAURÉS ---
                 cb1, cb2 = st.columns(2)
                 with cb1:
                     if st.button(f"➖", key=f"min_{name}", use_container_width=True):
-                        for idx, item in enumerate(st.session_state.cart):
-                            if item['name'] == name:
-                                st.session_state.cart.pop(idx)
-                                st.rerun()
-                                break
+                        if st.session_state.cart.remove_one(name): st.rerun()
                 with cb2:
                     if st.button(f"➕", key=f"pls_{name}", use_container_width=True, type="primary"):
-                        st.session_state.cart.append({'name': name, 'source': p_source, 'insurance': p_ins, 'price_disp': price_str})
+                        st.session_state.cart.add(name, p_source, p_ins)
                         st.rerun()
 
+        for slot, name, data, future in slots:
+            slot.markdown(catalogue_card_html(name, data, future.result(), p_source, fleet_totals.model(name)), unsafe_allow_html=True)
+
     with col_cart:
         st.subheader("VALIDATION")
         if st.session_state.current_pilot:
@@ -440,109 +627,126 @@ def catalogue_page():
 
         if not st.session_state.cart: st.info("Panier vide.")
         else:
-            cart_counts = {}
-            for item in st.session_state.cart:
-                # FIX: safe get pour price_disp pour éviter crash sur ancien panier
-                p_disp = item.get('price_disp', 'N/A')
-                key = (item['name'], item['source'], item['insurance'], p_disp)
-                cart_counts[key] = cart_counts.get(key, 0) + 1
-            
-            for (c_name, c_src, c_ins, c_prc), count in cart_counts.items():
+            lookup = get_ship_lookup()
+            for (c_name, c_src, c_ins), count in st.session_state.cart.items():
+                c_prc = lookup.at[c_name, 'label_usd' if c_src == 'STORE' else 'label_auec'] if c_name in lookup.index else 'N/A'
                 st.markdown(f"""<div style="background:rgba(255,255,255,0.05); padding:6px; border-radius:4px; margin-bottom:4px; border-left:3px solid #00d4ff;"><b>{c_name}</b> <span style="background:#333; padding:1px 5px; border-radius:3px;">x{count}</span><br><span style="font-size:0.8em; color:#aaa;">{c_src} | {c_ins} | {c_prc}</span></div>""", unsafe_allow_html=True)
+                qty_key = f"qty_{c_name}_{c_src}_{c_ins}"
+                if st.session_state.get(qty_key) != count: st.session_state[qty_key] = count
+                st.number_input("Quantité", min_value=0, step=1, key=qty_key, label_visibility="collapsed",
+                                on_change=lambda k=(c_name, c_src, c_ins), wk=qty_key: st.session_state.cart.set_qty(k, st.session_state[wk]))
             
             st.markdown("---")
             if st.button(f"💾 ENREGISTRER TOUT ({len(st.session_state.cart)})", type="primary", use_container_width=True): submit_cart_batch()
-            if st.button("🗑️ Vider", use_container_width=True): st.session_state.cart = []; st.rerun()
+            if st.button("🗑️ Vider", use_container_width=True): st.session_state.cart.clear(); st.rerun()
 
 def my_hangar_page():
     st.subheader(f"HANGAR LOGISTIQUE | {st.session_state.current_pilot}")
+    # Backend découpé sans flux : seul le bin du pilote est relu (pas toute la DB)
+    if "db_overlay" not in st.session_state and not get_save_queue().pending() and get_shared_db().refresh_owner(st.session_state.current_pilot):
+        st.session_state.db = session_db()
+    repo = get_fleet_repo()
+    totals = repo.aggregates.pilot(st.session_state.current_pilot)
+    st.caption(f"{totals['count']} vaisseaux • ${totals['usd']:,.0f} USD • {totals['auec']:,.0f} aUEC • {totals['ready']} Flight Ready")
     pilot_data = st.session_state.db.get("user_data", {}).get(st.session_state.current_pilot, {})
     current_auec = pilot_data.get("auec_balance", 0)
     target = pilot_data.get("acquisition_target", None)
-    my_fleet = [s for s in st.session_state.db["fleet"] if s["Propriétaire"] == st.session_state.current_pilot]
+    has_ships = totals['count'] > 0
 
     tab_fleet, tab_acq = st.tabs(["🚀 MA FLOTTE", "🎯 OBJECTIF D'ACHAT"])
 
     with tab_fleet:
-        search_hangar = st.text_input("🔍 Rechercher un vaisseau dans mon hangar...", "")
-        if not my_fleet:
+        # La grille d'édition groupée couvre tout le hangar : pas de recherche tant qu'elle est ouverte
+        search_hangar = st.text_input("🔍 Rechercher un vaisseau dans mon hangar...", "", disabled=st.session_state.get("hangar_batch", False))
+        batch_mode = st.toggle("✏️ ÉDITION GROUPÉE", key="hangar_batch", disabled=not has_ships,
+                               help="Modifier plusieurs groupes dans une grille, puis tout envoyer en une fois.")
+        if not batch_mode: end_hangar_batch()
+        if not has_ships:
             st.info("Hangar vide.")
         else:
-            df = pd.DataFrame(my_fleet)
-            if search_hangar:
+            df = repo.frame()
+            df = df[df["Propriétaire"] == st.session_state.current_pilot]
+            if search_hangar and not batch_mode:
                 m = search_hangar.lower()
                 df = df[df["Vaisseau"].str.lower().str.contains(m) | df["Rôle"].str.lower().str.contains(m)]
 
-            df['is_flagship'] = df['Vaisseau'].apply(check_is_high_value)
-            
             # Groupement avec FlightReady & NeedCrew
-            grp = df.groupby(['Vaisseau', 'Source', 'Assurance', 'FlightReady', 'NeedCrew']).agg({
+            grp = df.groupby(['Vaisseau', 'Source', 'Assurance', 'FlightReady', 'NeedCrew'], observed=True).agg({
                 'id': 'count', 'Image': 'first', 'crew_max': 'max'
             }).reset_index().rename(columns={'id': 'Quantité'})
             grp = grp.sort_values('Vaisseau')
-
-            cols = st.columns(3)
-            for i, row in grp.iterrows():
-                with cols[i % 3]:
-                    name = row['Vaisseau']
-                    source = row['Source']
-                    insurance = row['Assurance']
-                    is_ready = row['FlightReady']
-                    need_crew = row['NeedCrew']
-                    count = row['Quantité']
-                    max_slots = int(row['crew_max']) if row['crew_max'] else 1
-                    img_b64 = get_local_img_as_base64(SHIPS_DB.get(name, {}).get('img', ''))
+            lookup = get_ship_lookup()
+            grp['is_flagship'] = lookup_column(grp['Vaisseau'], lookup, 'is_flagship', False)
+            grp['Prix'] = np.where(grp['Source'] == 'STORE',
+                                   lookup_column(grp['Vaisseau'], lookup, 'label_usd', "N/A"),
+                                   lookup_column(grp['Vaisseau'], lookup, 'label_auec', "N/A"))
+
+            if batch_mode:
+                hangar_batch_editor(st.session_state.current_pilot, grp)
+            else:
+                cols = st.columns(3)
+                for i, row in grp.iterrows():
+                    with cols[i % 3]:
+                        name = row['Vaisseau']
+                        source = row['Source']
+                        insurance = row['Assurance']
+                        is_ready = row['FlightReady']
+                        need_crew = row['NeedCrew']
+                        count = row['Quantité']
+                        max_slots = int(row['crew_max']) if row['crew_max'] else 1
                     
-                    info = SHIPS_DB.get(name, {})
-                    p_display = f"${info.get('price', 0):,.0f} USD" if source == 'STORE' else f"{info.get('auec_price', 0):,.0f} aUEC"
-                    p_col = "#00d4ff" if source == 'STORE' else "#30e8ff"
+                        info = SHIPS_DB.get(name, {})
+                        p_display = row['Prix']
+                        p_col = "#00d4ff" if source == 'STORE' else "#30e8ff"
                     
-                    # Classes CSS conditionnelles
-                    card_class = "corpo-card flagship-card" if df.iloc[0]['is_flagship'] else "corpo-card"
-                    if need_crew: card_class += " crew-card"
-                    img_style = "height:350px;" if df.iloc[0]['is_flagship'] else "height:200px;"
-                    crew_badge = f"<span class='crew-tag'>CREW MAX: {max_slots}</span>" if need_crew else ""
-
-                    st.markdown(f"""
-                    <div class="{card_class}">
-                        <img src="{img_b64}" class="corpo-card-img" style="{img_style}">
-                        <div class="corpo-card-header">
-                            <span class="corpo-card-title">{name}</span>
-                            <span class="corpo-card-count">x{count}</span>
-                        </div>
-                        <div class="corpo-card-body">
-                            <div style="display:flex; justify-content:space-between;">
-                                <span>{source}</span>
-                                <span style="color:{p_col}; font-weight:bold;">{p_display}</span>
+                        # Classes CSS conditionnelles
+                        img_src = get_img_src(info.get('img', ''), 350 if row['is_flagship'] else 200)
+                        card_class = "corpo-card flagship-card" if row['is_flagship'] else "corpo-card"
+                        if need_crew: card_class += " crew-card"
+                        img_style = "height:350px;" if row['is_flagship'] else "height:200px;"
+                        crew_badge = f"<span class='crew-tag'>CREW MAX: {max_slots}</span>" if need_crew else ""
+
+                        st.markdown(f"""
+                        <div class="{card_class}">
+                            <img src="{img_src}" class="corpo-card-img" style="{img_style}">
+                            <div class="corpo-card-header">
+                                <span class="corpo-card-title">{name}</span>
+                                <span class="corpo-card-count">x{count}</span>
+                            </div>
+                            <div class="corpo-card-body">
+                                <div style="display:flex; justify-content:space-between;">
+                                    <span>{source}</span>
+                                    <span style="color:{p_col}; font-weight:bold;">{p_display}</span>
+                                </div>
+                                <div style="margin-top:5px;">{crew_badge}</div>
                             </div>
-                            <div style="margin-top:5px;">{crew_badge}</div>
                         </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                        """, unsafe_allow_html=True)
                     
-                    c_edit, c_del = st.columns([3, 1])
-                    with c_edit:
-                        ins_opts = ["LTI", "10 Ans", "2 ans", "6 Mois", "2 Mois", "Standard"]
-                        new_ins = st.selectbox("Assurance", ins_opts, index=ins_opts.index(insurance) if insurance in ins_opts else 5, key=f"ins_{i}_{name}_{source}_{is_ready}", label_visibility="collapsed")
+                        # Clés tirées de tout le groupe : si la DB change sous la page (flux, bin relu), les widgets
+                        # repartent des nouvelles valeurs au lieu de réécrire l'ancien état
+                        gkey = f"{name}_{source}_{insurance}_{is_ready}_{need_crew}"
+                        c_edit, c_del = st.columns([3, 1])
+                        with c_edit:
+                            new_ins = st.selectbox("Assurance", INSURANCE_OPTIONS, index=INSURANCE_OPTIONS.index(insurance) if insurance in INSURANCE_OPTIONS else 5, key=f"ins_{gkey}", label_visibility="collapsed")
                         
-                        c_t1, c_t2 = st.columns(2)
-                        with c_t1:
-                            new_ready = st.toggle("🚀 Flight Ready", value=is_ready, key=f"ready_{i}_{name}_{source}")
-                        with c_t2:
-                            new_need = st.toggle("📢 Search Crew", value=need_crew, key=f"need_{i}_{name}_{source}")
-
-                        if new_ins != insurance or new_ready != is_ready or new_need != need_crew:
-                            update_ship_attributes(st.session_state.current_pilot, name, source, insurance, is_ready, need_crew, new_ins, new_ready, new_need)
-
-                    with c_del:
-                        if st.button("🗑️", key=f"del_{i}_{name}_{source}_{is_ready}", help="Retirer"):
-                            for s in st.session_state.db["fleet"]:
-                                if (s["Propriétaire"] == st.session_state.current_pilot and s["Vaisseau"] == name and s["Source"] == source and s["Assurance"] == insurance and s.get("FlightReady", False) == is_ready):
-                                    to_remove = s['id']
-                                    st.session_state.db["fleet"] = [x for x in st.session_state.db["fleet"] if x['id'] != to_remove]
-                                    save_db_to_cloud(st.session_state.db)
+                            c_t1, c_t2 = st.columns(2)
+                            with c_t1:
+                                new_ready = st.toggle("🚀 Flight Ready", value=is_ready, key=f"ready_{gkey}")
+                            with c_t2:
+                                new_need = st.toggle("📢 Search Crew", value=need_crew, key=f"need_{gkey}")
+
+                            if new_ins != insurance or new_ready != is_ready or new_need != need_crew:
+                                update_ship_attributes(st.session_state.current_pilot, name, source, insurance, is_ready, need_crew, new_ins, new_ready, new_need)
+
+                        with c_del:
+                            if st.button("🗑️", key=f"del_{gkey}", help="Retirer"):
+                                repo = get_fleet_repo(write=True)
+                                group_ids = repo.ids_for_group((st.session_state.current_pilot, name, source, insurance, bool(is_ready), bool(need_crew)))
+                                if group_ids:
+                                    to_remove = repo.remove(min(group_ids))['id']
+                                    save_db_to_cloud(st.session_state.db, ChangeSet().delete_ship(to_remove))
                                     st.rerun()
-                                    break
 
     with tab_acq:
         st.markdown("### 🎯 CALCULATEUR D'OBJECTIF")
@@ -559,10 +763,10 @@ def my_hangar_page():
             st.slider("Jauge", 0, sl_max, value=st.session_state.calc_balance, key="sl_val", on_change=lambda: st.session_state.update({"calc_balance": st.session_state.sl_val}))
             
             if st.button("💾 ENREGISTRER", type="primary", use_container_width=True):
-                st.session_state.db["user_data"][st.session_state.current_pilot] = {"auec_balance": st.session_state.calc_balance, "acquisition_target": new_tgt}
-                save_db_to_cloud(st.session_state.db)
-                st.success("Sauvegardé !")
-                time.sleep(0.5); st.rerun()
+                writable_db()["user_data"][st.session_state.current_pilot] = {"auec_balance": st.session_state.calc_balance, "acquisition_target": new_tgt}
+                save_db_to_cloud(st.session_state.db, ChangeSet().set_user_data(st.session_state.current_pilot, st.session_state.db["user_data"][st.session_state.current_pilot]))
+                flash("success", "Sauvegardé !")
+                st.rerun()
         with c2:
             if tgt_price > 0:
                 pct = min(1.0, st.session_state.calc_balance / tgt_price)
@@ -573,7 +777,13 @@ def my_hangar_page():
 def need_crew_page():
     st.subheader("📢 OFFRES D'ÉQUIPAGE (NEED CREW)")
     st.markdown("Rejoignez les équipages formés par les membres.")
-    crew_ships = [s for s in st.session_state.db["fleet"] if s.get("NeedCrew") == True]
+    need_crew_board()
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS if storage_online() else None)
+def need_crew_board():
+    """Tableau seul, rejoué toutes les `LIVE_REFRESH_SECONDS` s : inscriptions des autres membres visibles en direct."""
+    st.session_state.db = session_db()
+    crew_ships = [s for s in get_fleet_repo().rows if s.get("NeedCrew") == True]
     
     if not crew_ships:
         st.info("Aucune offre d'équipage.")
@@ -582,7 +792,7 @@ def need_crew_page():
     cols = st.columns(3)
     for i, ship in enumerate(crew_ships):
         with cols[i % 3]:
-            img = get_local_img_as_base64(ship.get("Image", ""))
+            img = get_img_src(ship.get("Image", ""), 200)
             owner = ship["Propriétaire"]
             crew_list = ship.get("CrewList", [])
             current_user = st.session_state.current_pilot
@@ -623,64 +833,67 @@ def need_crew_page():
 
 def corpo_fleet_page():
     st.subheader("FLOTTE CORPORATIVE")
-    df = pd.DataFrame(st.session_state.db["fleet"])
-    if df.empty: st.info("Aucune donnée."); return
+    repo = get_fleet_repo()
+    if not len(repo): st.info("Aucune donnée."); return
+    df = repo.frame()
+    corp = repo.aggregates.corp
 
     c1, c2, c3, c4 = st.columns(4)
-    usd = df[df['Source']=='STORE']['Prix_USD'].sum()
-    auec = df[df['Source']=='INGAME']['Prix_aUEC'].sum()
-    c1.metric("VAISSEAUX", len(df))
-    c2.metric("VALEUR FLOTTE (USD)", f"${usd:,.0f}")
-    c3.metric("VALEUR FLOTTE (aUEC)", f"{auec:,.0f}")
-    c4.metric("FLIGHT READY", df['FlightReady'].sum() if 'FlightReady' in df.columns else 0)
+    c1.metric("VAISSEAUX", corp["count"])
+    c2.metric("VALEUR FLOTTE (USD)", f"${corp['usd']:,.0f}")
+    c3.metric("VALEUR FLOTTE (aUEC)", f"{corp['auec']:,.0f}")
+    c4.metric("FLIGHT READY", corp["ready"])
 
     st.markdown("---")
     
     tab_visu, tab_table, tab_members = st.tabs(["🚀 VUE FLOTTE", "📋 REGISTRE COMPLET", "👥 MEMBRES"])
     
     with tab_visu:
-        df['is_flagship'] = df['Vaisseau'].apply(check_is_high_value)
+        is_flagship = lookup_column(df['Vaisseau'], get_ship_lookup(), 'is_flagship', False)
         
         st.markdown("#### ⭐ FLOTTE AMIRALE")
-        flags = df[df['is_flagship'] == True]
+        flags = df[is_flagship]
         if not flags.empty:
             cols = st.columns(3)
-            grp_f = flags.groupby(['Vaisseau']).agg({'Image':'first', 'Propriétaire': lambda x: list(set(x))}).reset_index()
+            grp_f = flags.groupby(['Vaisseau'], observed=True).agg({'Image':'first', 'Propriétaire': 'unique'}).reset_index()
             for i, row in grp_f.iterrows():
                 with cols[i%3]:
-                    img = get_local_img_as_base64(row['Image'])
+                    img = get_img_src(row['Image'], 350)
                     pilots = "".join([f"<span class='corpo-pilot-tag'>{p}</span>" for p in row['Propriétaire']])
                     st.markdown(f"""<div class="corpo-card flagship-card"><img src="{img}" class="corpo-card-img"><div class="corpo-card-header"><span>{row['Vaisseau']}</span></div><div class="corpo-card-body">{pilots}</div></div>""", unsafe_allow_html=True)
         
         st.markdown("#### 🚀 FLOTTE STANDARD")
-        std = df[df['is_flagship'] == False]
+        std = df[~is_flagship]
         if not std.empty:
             roles = sorted(std['Rôle'].unique())
             # CORRECTION : REMPLACEMENT DES TABS PAR SELECTBOX (pour éviter la barre rouge)
             sel_role = st.selectbox("📂 Filtrer par Rôle", ["Tout afficher"] + roles)
             if sel_role != "Tout afficher": std = std[std['Rôle'] == sel_role]
             
-            grp_s = std.groupby(['Vaisseau']).agg({'id':'count', 'Image':'first'}).reset_index()
+            grp_s = std.groupby(['Vaisseau'], observed=True).agg({'id':'count', 'Image':'first'}).reset_index()
             cols = st.columns(4)
             for i, row in grp_s.iterrows():
                 with cols[i%4]:
-                    img = get_local_img_as_base64(row['Image'])
+                    img = get_img_src(row['Image'], 150)
                     st.markdown(f"""<div class="corpo-card"><img src="{img}" class="corpo-card-img" style="height:150px;"><div class="corpo-card-header"><span style="font-size:0.9em">{row['Vaisseau']}</span><span class="corpo-card-count">x{row['id']}</span></div></div>""", unsafe_allow_html=True)
 
     with tab_table:
         c_search, c_void = st.columns([2, 1])
         with c_search: search = st.text_input("🔍 Filtrer...", "")
-        df_disp = df.copy()
+        df_disp = df
         if search:
             m = search.lower()
             df_disp = df_disp[df_disp["Vaisseau"].str.lower().str.contains(m) | df_disp["Propriétaire"].str.lower().str.contains(m) | df_disp["Rôle"].str.lower().str.contains(m)]
 
-        grp = df_disp.groupby(['Vaisseau', 'Source', 'Rôle']).agg({'Propriétaire': lambda x: ', '.join(sorted(x.unique())), 'id': 'count', 'Image': 'first'}).reset_index().rename(columns={'id': 'Quantité'})
-        grp['Visuel'] = grp['Image'].apply(get_local_img_as_base64)
+        grp = df_disp.groupby(['Vaisseau', 'Source', 'Rôle'], observed=True).agg({'Propriétaire': 'unique', 'id': 'count', 'Image': 'first'}).reset_index().rename(columns={'id': 'Quantité'})
+        grp['Propriétaire'] = grp['Propriétaire'].map(lambda owners: ', '.join(sorted(owners)))
+        grp['Visuel'] = grp['Image'].apply(get_img_src, height=150)
         
-        # --- CORRECTION DE L'ERREUR ICI ---
-        # Utilisation de la fonction get_current_ship_price pour éviter le crash sur les valeurs vides/None
-        grp['Valeur'] = grp.apply(lambda r: f"${get_current_ship_price(r['Vaisseau'], 'USD'):,.0f}" if r['Source']=='STORE' else f"{get_current_ship_price(r['Vaisseau'], 'aUEC'):,.0f} aUEC", axis=1)
+        # Valeur via la table par modèle (prix non numériques déjà normalisés)
+        lookup = get_ship_lookup()
+        grp['Valeur'] = np.where(grp['Source'] == 'STORE',
+                                 lookup_column(grp['Vaisseau'], lookup, 'label_usd', "N/A"),
+                                 lookup_column(grp['Vaisseau'], lookup, 'label_auec', "N/A"))
         
         # CORRECTION: Largeur fixe pour l'image (pour le menu)
         st.dataframe(grp[['Visuel', 'Vaisseau', 'Rôle', 'Source', 'Propriétaire', 'Quantité', 'Valeur']], column_config={"Visuel": st.column_config.ImageColumn("Aperçu", width=150)}, use_container_width=True, hide_index=True, height=800)
@@ -688,17 +901,38 @@ def corpo_fleet_page():
     with tab_members:
         st.subheader("👥 LISTE DES MEMBRES")
         all_users = set(st.session_state.db["users"].keys())
-        all_owners = set(df["Propriétaire"].unique())
+        all_owners = set(repo.aggregates.by_pilot)
         all_pilots = sorted(list(all_users | all_owners))
         if "INCONNU" in all_pilots: all_pilots.remove("INCONNU")
         
         data_members = []
         for p in all_pilots:
-            p_ships = df[df["Propriétaire"] == p]
             target_p = st.session_state.db["user_data"].get(p, {}).get("acquisition_target", "Aucun")
-            data_members.append({"Pilote": p, "Vaisseaux": len(p_ships), "Objectif Actuel": target_p})
+            data_members.append({"Pilote": p, "Vaisseaux": repo.aggregates.pilot(p)["count"], "Objectif Actuel": target_p})
         st.dataframe(pd.DataFrame(data_members), use_container_width=True, hide_index=True)
 
+def _hit_rate(hits, total):
+    return f"{100 * hits / total:.0f} %" if total else "—"
+
+def perf_panel():
+    scope = st.radio("Portée", ["Toutes les sessions", "Cette session"], horizontal=True, key="perf_scope")
+    session = session_key() if scope == "Cette session" else None
+    stats = PERF.stage_stats(session)
+    if stats: st.dataframe(pd.DataFrame(stats).set_index("étape").round(1), use_container_width=True)
+
+    img = IMAGE_CACHE.stats()
+    db_calls, db_misses = PERF.counters["db_cache_call"], PERF.counters["db_cache_miss"]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("CACHE IMAGES", _hit_rate(img["hits"], img["hits"] + img["misses"]), f"{img['entries']} entrées · {img['bytes'] / 1e6:.1f} Mo", delta_color="off")
+    c2.metric("CACHE DB", _hit_rate(db_calls - db_misses, db_calls), f"{db_calls} chargements", delta_color="off")
+    c3.metric("RERUNS MESURÉS", len(PERF.slowest(10**6, session)))
+
+    st.markdown("#### Reruns les plus lents")
+    slow = [{"heure": time.strftime("%H:%M:%S", time.localtime(r.at)), "session": r.session[:6], "page": r.label,
+             "total (ms)": round(r.total_ms, 1),
+             "étape principale": max(r.stages, key=r.stages.get) if r.stages else "—"} for r in PERF.slowest(10, session)]
+    if slow: st.dataframe(pd.DataFrame(slow), use_container_width=True, hide_index=True)
+
 # --- PAGE ADMIN ---
 def admin_page():
     st.subheader("🔧 ADMINISTRATION")
@@ -724,20 +958,37 @@ def admin_page():
         new_code = st.text_input("Nouveau Code Corpo")
         if st.button("METTRE À JOUR"):
             if new_code:
-                st.session_state.db["corpo_code"] = new_code
-                if save_db_to_cloud(st.session_state.db): st.success(f"Code Corpo changé : {new_code}")
+                writable_db()["corpo_code"] = new_code
+                if save_db_to_cloud(st.session_state.db, ChangeSet().set_meta("corpo_code", new_code)): st.success(f"Code Corpo changé : {new_code}")
         
+        storage = get_storage() if storage_online() else None
+        client = getattr(storage, "client", None)
+        if client is not None:
+            st.markdown("---")
+            st.markdown("### 📡 JSONBin")
+            # Tête du flux créée à la première écriture (ou reprise du document) : d'ici là, pas de relevé
+            if not storage.feed_bin_id:
+                st.warning("Pas de flux de modifications : les autres instances ne verront les changements qu'au rechargement (5 min). Il sera créé à la prochaine sauvegarde.")
+            if client.calls: st.dataframe(pd.DataFrame(client.stats()).T.round(1), use_container_width=True)
+
+        st.markdown("---")
+        # Statistiques calculées seulement à l'ouverture du panneau
+        if st.toggle("⏱️ PERFORMANCES", key="perf_panel"): perf_panel()
+
         st.markdown("---")
         if st.button("Se déconnecter"): st.session_state.admin_unlocked = False; st.rerun()
 
 # --- MAIN LOOP ---
-render_sidebar()
-
-if not st.session_state.current_pilot:
-    home_page()
-else:
-    if st.session_state.menu_nav == "CATALOGUE": catalogue_page()
-    elif st.session_state.menu_nav == "MON HANGAR": my_hangar_page()
-    elif st.session_state.menu_nav == "FLOTTE CORPO": corpo_fleet_page()
-    elif st.session_state.menu_nav == "NEED CREW": need_crew_page()
-    elif st.session_state.menu_nav == "ADMINISTRATION": admin_page()
\ No newline at end of file
+PAGES = {"CATALOGUE": catalogue_page, "MON HANGAR": my_hangar_page, "FLOTTE CORPO": corpo_fleet_page,
+         "NEED CREW": need_crew_page, "ADMINISTRATION": admin_page}
+try:
+    with PERF_RUN.span("sidebar"): render_sidebar()
+    show_save_status()
+
+    PERF_RUN.label = st.session_state.menu_nav if st.session_state.current_pilot else "ACCUEIL"
+    page = PAGES.get(st.session_state.menu_nav) if st.session_state.current_pilot else home_page
+    if page is not None:
+        with PERF_RUN.span(f"page {PERF_RUN.label}"): page()
+finally:
+    # Aussi sur st.rerun() / st.stop(), qui interrompent le script par exception
+    PERF.end(PERF_RUN)
\ No newline at end of file
@@ -0,0 +1,161 @@
+# bench_pages.py
+"""Rendu des pages via AppTest sur des DB synthétiques : temps, pic mémoire, éléments et octets émis.
+
+    python bench_pages.py --sizes 300 3000 --save bench_baseline.json
+    python bench_pages.py --sizes 300 3000 --compare bench_baseline.json --threshold 0.25 --wall-threshold 0.5
+
+Temps et pic mémoire sont nets du coût d'un rerun vide du harnais (`empty_rerun`). Cette déduction est
+calibrée sur streamlit 1.66.0 (`CALIBRATED_STREAMLIT`) : refaire la référence après une mise à jour.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from images import wait_background
+from jsonbin_local import LocalJsonBin
+from synthetic_fleet import make_synthetic_db
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PAGES = {"catalogue": "CATALOGUE", "hangar": "MON HANGAR", "corpo": "FLOTTE CORPO", "need_crew": "NEED CREW"}
+SIZES = (300, 3_000)
+# Métriques comparées à la référence : octets, éléments et pic mémoire sont stables d'un lancement à
+# l'autre et comparés à --threshold ; le temps, bruité, à --wall-threshold
+COMPARED = ("peak_kb", "elements", "bytes")
+WALL_MIN_DELTA_MS = 5.0     # écart de temps ignoré en dessous (bruit d'ordonnancement)
+# Version de streamlit sur laquelle la déduction du rerun vide a été calibrée
+CALIBRATED_STREAMLIT = "1.66.0"
+
+# Script d'amorce des reruns : AppTest recompile son script à chaque rerun, et la compilation d'app.py
+# (~4 Mo transitoires) masquait le pic mémoire des pages. L'amorce exécute app.py compilé une seule fois,
+# comme le ScriptCache du serveur ; sa propre compilation est couverte par le rerun vide.
+BOOTSTRAP = "import bench_pages\nbench_pages.exec_app()\n"
+_app_code = None
+
+
+def exec_app() -> None:
+    """Exécute app.py (bytecode compilé au premier appel) ; appelé par `BOOTSTRAP` à chaque rerun."""
+    global _app_code
+    if _app_code is None:
+        with open(APP_PATH, encoding="utf-8") as f:
+            _app_code = compile(f.read(), APP_PATH, "exec")
+    exec(_app_code, {"__name__": "__main__", "__file__": APP_PATH})
+
+
+def _measure(at: AppTest, repeat: int) -> dict:
+    """Temps médian de `repeat` reruns et pic mémoire (tracemalloc) d'un rerun de plus."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    at.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"wall_ms": 1000 * statistics.median(times), "peak_kb": peak / 1024}
+
+
+def empty_rerun(repeat: int) -> dict:
+    """Coût du harnais seul : rerun d'un script qui n'affiche rien."""
+    at = AppTest.from_string("import bench_pages\n")
+    at.run()
+    return _measure(at, repeat)
+
+
+def _walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from _walk(child)
+
+
+def _emitted(at: AppTest) -> dict:
+    """Éléments émis par le dernier rerun (page et barre latérale), taille sérialisée totale et part de
+    HTML/markdown."""
+    nodes = [n for root in (at.main, at.sidebar) for n in _walk(root)]
+    elements = [n for n in nodes if getattr(n, "proto", None) is not None and not hasattr(n, "children")]
+    html = sum(len(getattr(e, "value", "") or "") for e in elements if e.type in ("markdown", "html"))
+    return {"elements": len(elements), "bytes": sum(e.proto.ByteSize() for e in elements), "html_bytes": html}
+
+
+def bench_page(server: LocalJsonBin, bin_id: str, pilot: str, page: str, repeat: int, empty: dict) -> dict:
+    at = AppTest.from_string(BOOTSTRAP, default_timeout=300)
+    at.secrets["JSONBIN_URL"] = server.url   # DB servie par le JSONBin local (pages en lecture seule)
+    at.secrets["JSONBIN_KEY"] = server.master_key
+    at.secrets["JSONBIN_ID"] = bin_id
+    at.run()
+    at.session_state.current_pilot = pilot
+    at.session_state.menu_nav = page
+    at.run()                                # premier rendu : caches et index construits
+    if at.exception: raise RuntimeError(f"{page} : {at.exception[0].message}")
+    wait_background(60)                     # miniatures demandées par ce rendu : hors mesure
+    at.run()
+    m = _measure(at, repeat)
+    net = {key: round(max(0.0, m[key] - empty[key]), 1) for key in m}
+    return {**net, **_emitted(at)}
+
+
+def run(sizes, repeat: int, need_crew_ratio: float) -> dict:
+    results = {}
+    if st.__version__ != CALIBRATED_STREAMLIT:
+        print(f"streamlit {st.__version__} : déduction du harnais calibrée sur {CALIBRATED_STREAMLIT}, refaire la référence")
+    empty = empty_rerun(repeat)
+    print(f"rerun vide : {empty['wall_ms']:.1f} ms, {empty['peak_kb']:.1f} Ko (déduits)")
+    with LocalJsonBin() as server:
+        for n in sizes:
+            db = make_synthetic_db(n, need_crew_ratio=need_crew_ratio)
+            server.bins[f"bench-{n}"] = db
+            st.cache_resource.clear()            # DB partagée du processus : rechargée pour chaque taille
+            pilot = max(db["users"], key=lambda p: sum(s["Propriétaire"] == p for s in db["fleet"]))
+            for key, page in PAGES.items():
+                results[f"{key}@{n}"] = r = bench_page(server, f"bench-{n}", pilot, page, repeat, empty)
+                print(f"{key:>10} {n:>7} {r['wall_ms']:>9.1f} ms {r['peak_kb']:>10.1f} Ko {r['elements']:>6} él. {r['bytes'] / 1024:>9.1f} Ko")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, wall_threshold: float) -> list:
+    """Régressions : métrique au-delà de référence × (1 + seuil) ; temps médian à `wall_threshold` et
+    au moins `WALL_MIN_DELTA_MS` au-dessus de la référence."""
+    regressions = []
+    for case, ref in baseline.items():
+        cur = results.get(case)
+        if cur is None: continue
+        limits = [(metric, ref.get(metric, 0) * (1 + threshold)) for metric in COMPARED]
+        limits.append(("wall_ms", max(ref.get("wall_ms", 0) * (1 + wall_threshold), ref.get("wall_ms", 0) + WALL_MIN_DELTA_MS)))
+        for metric, limit in limits:
+            if ref.get(metric) and cur[metric] > limit:
+                regressions.append(f"{case} {metric}: {cur[metric]} > {ref[metric]} (+{100 * (cur[metric] / ref[metric] - 1):.0f} %)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=9, help="reruns chronométrés par page (temps médian)")
+    parser.add_argument("--need-crew", type=float, default=0.05, help="part des vaisseaux en recherche d'équipage")
+    parser.add_argument("--save", help="écrit les résultats comme référence")
+    parser.add_argument("--compare", help="référence à comparer ; code retour 1 en cas de régression")
+    parser.add_argument("--threshold", type=float, default=0.25, help="écart toléré : pic mémoire, éléments, octets")
+    parser.add_argument("--wall-threshold", type=float, default=0.5, help="écart toléré sur le temps médian")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.need_crew)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold, args.wall_threshold)
+        for line in regressions: print(f"RÉGRESSION {line}")
+        if regressions: sys.exit(1)
+        print("Aucune régression.")
+
+
+if __name__ == "__main__":
+    main()
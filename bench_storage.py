@@ -0,0 +1,89 @@
+# bench_storage.py
+"""Temps aller-retour et taille des chargements / sauvegardes JSONBin, sur le serveur local.
+
+    python bench_storage.py --sizes 100 1000 10000 50000 --latency 0.08 --bandwidth 2000000 --encodings json compact
+"""
+import argparse
+import gzip
+import json
+import statistics
+import time
+
+from jsonbin_local import LocalJsonBin
+from compact import ENCODINGS, encode_db
+from storage import ChangeSet, JsonBinClient, apply_changes, make_backend
+from synthetic_fleet import make_synthetic_db
+
+SIZES = (100, 1_000, 10_000, 50_000)
+
+
+def _timed(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), max(times), result
+
+
+def bench_size(server: LocalJsonBin, n_ships: int, repeat: int, gzip_requests: bool, encoding: str = "json",
+               kind: str = "jsonbin") -> dict:
+    db = make_synthetic_db(n_ships)
+    client = JsonBinClient(server.master_key, base_url=server.url, gzip_requests=gzip_requests, retries=0, pool_size=8)
+    backend = make_backend(kind, bin_id=f"bench-{kind}-{n_ships}-{encoding}", master_key=server.master_key,
+                           client=client, encoding=encoding)
+    raw = json.dumps(encode_db(db, encoding), separators=(",", ":")).encode("utf-8")
+    save_med, save_max, _ = _timed(lambda: backend.save(db), repeat)
+    load_med, load_max, loaded = _timed(backend.load, repeat)
+    assert len(loaded["fleet"]) == n_ships
+
+    current = [loaded]
+
+    def edit_one():
+        # Modification d'une seule ligne (cas courant : un pilote dans son hangar)
+        db = current[0]
+        row = dict(db["fleet"][0], FlightReady=not db["fleet"][0]["FlightReady"])
+        changes = ChangeSet().upsert_ship(row)
+        # Document validé (révision tamponnée par le backend) : base de la modification suivante
+        current[0] = dict(apply_changes(db, changes))
+        return backend.commit(current[0], changes)
+    commit_med, _, _ = _timed(edit_one, repeat)
+    return {
+        "ships": n_ships, "backend": kind, "encoding": encoding,
+        "payload_bytes": len(raw),
+        "payload_gzip_bytes": len(gzip.compress(raw, compresslevel=5)),
+        "save_ms": round(1000 * save_med, 1), "save_max_ms": round(1000 * save_max, 1),
+        "load_ms": round(1000 * load_med, 1), "load_max_ms": round(1000 * load_max, 1),
+        "commit_ms": round(1000 * commit_med, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="latence simulée par réponse (s)")
+    parser.add_argument("--bandwidth", type=float, default=None, help="débit simulé (octets/s)")
+    parser.add_argument("--gzip", action="store_true", help="compresse aussi les envois")
+    parser.add_argument("--sharded", action="store_true", help="compare aussi le backend découpé par pilote")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=["json"], help="encodages du document comparés")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    with LocalJsonBin(latency=args.latency, bandwidth=args.bandwidth) as server:
+        kinds = ["jsonbin", "jsonbin-sharded"] if args.sharded else ["jsonbin"]
+        results = [bench_size(server, n, args.repeat, args.gzip, enc, kind)
+                   for n in args.sizes for kind in kinds for enc in args.encodings]
+
+    print(f"{'vaisseaux':>10} {'backend':>16} {'encodage':>9} {'JSON (Ko)':>10} {'gzip (Ko)':>10} "
+          f"{'save (ms)':>10} {'load (ms)':>10} {'1 ligne (ms)':>13}")
+    for r in results:
+        print(f"{r['ships']:>10} {r['backend']:>16} {r['encoding']:>9} {r['payload_bytes'] / 1024:>10.1f} "
+              f"{r['payload_gzip_bytes'] / 1024:>10.1f} {r['save_ms']:>10.1f} {r['load_ms']:>10.1f} {r['commit_ms']:>13.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"latency": args.latency, "bandwidth": args.bandwidth, "gzip": args.gzip, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
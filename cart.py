@@ -0,0 +1,69 @@
+# cart.py
+"""Panier du catalogue : multiset (vaisseau, source, assurance) -> quantité."""
+from typing import Dict, Iterator, Tuple
+
+CartKey = Tuple[str, str, str]   # (nom, source, assurance)
+
+
+class Cart:
+    """Quantités par ligne de panier, avec total par vaisseau tenu à jour en O(1)."""
+
+    def __init__(self):
+        self._qty: Dict[CartKey, int] = {}
+        self._by_name: Dict[str, Dict[CartKey, None]] = {}   # nom -> clés (ordre d'ajout)
+        self._name_count: Dict[str, int] = {}
+        self._total = 0
+
+    @classmethod
+    def from_items(cls, items) -> "Cart":
+        """Reprise d'un ancien panier (liste de dicts name/source/insurance)."""
+        cart = cls()
+        for item in items:
+            cart.add(item["name"], item["source"], item["insurance"])
+        return cart
+
+    def set_qty(self, key: CartKey, qty: int) -> None:
+        name = key[0]
+        qty = max(0, int(qty))
+        delta = qty - self._qty.get(key, 0)
+        if not delta: return
+        if qty:
+            self._qty[key] = qty
+            self._by_name.setdefault(name, {})[key] = None
+        else:
+            del self._qty[key]
+            del self._by_name[name][key]
+            if not self._by_name[name]: del self._by_name[name]
+        self._name_count[name] = self._name_count.get(name, 0) + delta
+        if not self._name_count[name]: del self._name_count[name]
+        self._total += delta
+
+    def add(self, name: str, source: str, insurance: str, qty: int = 1) -> None:
+        key = (name, source, insurance)
+        self.set_qty(key, self._qty.get(key, 0) + qty)
+
+    def remove_one(self, name: str) -> bool:
+        """Retire un exemplaire de `name` (ligne la plus ancienne) ; False si absent."""
+        keys = self._by_name.get(name)
+        if not keys: return False
+        key = next(iter(keys))
+        self.set_qty(key, self._qty[key] - 1)
+        return True
+
+    def count(self, name: str) -> int:
+        return self._name_count.get(name, 0)
+
+    def qty(self, key: CartKey) -> int:
+        return self._qty.get(key, 0)
+
+    def items(self) -> Iterator[Tuple[CartKey, int]]:
+        return iter(list(self._qty.items()))
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def __len__(self):
+        return self._total
+
+    def __bool__(self):
+        return self._total > 0
@@ -0,0 +1,139 @@
+# catalog.py
+"""Structures dérivées du catalogue (SHIPS_DB), construites une seule fois et partagées par les pages."""
+from typing import Dict, Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+HIGH_VALUE_USD = 800
+
+
+# --- 1. TABLE DE VALORISATION PAR MODÈLE ---
+
+def _auec_value(value) -> float:
+    """Prix aUEC numérique ("Non achetable en jeu", None, etc. -> 0)."""
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
+
+def build_ship_lookup(ships_db: Dict[str, Any], flagships: Iterable[str]) -> pd.DataFrame:
+    """Table indexée par nom de vaisseau : prix USD/aUEC numériques, statut amiral et libellés formatés."""
+    flagships = set(flagships)
+    names = list(ships_db) + [n for n in flagships if n not in ships_db]
+    usd = np.array([float(ships_db.get(n, {}).get("price", 0) or 0) for n in names], dtype="float64")
+    auec = np.array([_auec_value(ships_db.get(n, {}).get("auec_price", 0)) for n in names], dtype="float64")
+    lookup = pd.DataFrame({"usd": usd, "auec": auec}, index=pd.Index(names, name="Vaisseau"))
+    lookup["is_flagship"] = lookup.index.isin(list(flagships)) | (lookup["usd"] >= HIGH_VALUE_USD)
+    lookup["label_usd"] = [f"${v:,.0f} USD" for v in usd]
+    lookup["label_auec"] = [f"{v:,.0f} aUEC" if v > 0 else "N/A" for v in auec]
+    return lookup
+
+
+def lookup_column(names: pd.Series, lookup: pd.DataFrame, column: str, default) -> np.ndarray:
+    """Projette `lookup[column]` sur une colonne de noms ; pour une catégorie, un seul accès par modèle distinct."""
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        per_cat = lookup[column].reindex(names.cat.categories).to_numpy(dtype=object)
+        per_cat = np.append(per_cat, default)               # code -1 (NaN) -> défaut
+        per_cat[pd.isna(per_cat)] = default
+        values = per_cat[names.cat.codes.to_numpy()]
+    else:
+        values = names.map(lookup[column]).to_numpy(dtype=object)
+        values[pd.isna(values)] = default
+    return values.astype(type(default)) if isinstance(default, (bool, float)) else values
+
+
+# --- 2. CARACTÉRISTIQUES NUMÉRIQUES (scrap.json -> float, NaN pour "-") ---
+
+# Colonne -> (champ source dans SHIPS_DB, libellé)
+SPEC_COLUMNS = {
+    "cargo": ("Cargocapacity", "Cargo (SCU)"),
+    "speed": ("Speed", "Vitesse (m/s)"),
+    "mass": ("mass", "Masse (kg)"),
+    "length": ("Length", "Longueur (m)"),
+    "crew_max": ("crew_max", "Équipage max"),
+    "price": ("price", "Prix (USD)"),
+    "auec": ("auec_price", "Prix (aUEC)"),
+}
+_NUMBER_RE = r"^\s*(-?\d+(?:\.\d+)?)"
+
+
+def parse_spec_column(values: pd.Series) -> pd.Series:
+    """"26,486.00 Kg" -> 26486.0, "225 m/s" -> 225.0 ; "-", texte ou absent -> NaN (vectorisé)."""
+    text = values.astype("string").str.replace(",", "", regex=False)
+    return pd.to_numeric(text.str.extract(_NUMBER_RE, expand=False), errors="coerce").astype("float64")
+
+
+def build_spec_frame(ships_db: Dict[str, Any]) -> pd.DataFrame:
+    """Table indexée par nom de vaisseau, une colonne float64 par entrée de SPEC_COLUMNS."""
+    raw = pd.DataFrame.from_dict(ships_db, orient="index")
+    specs = pd.DataFrame(index=pd.Index(list(ships_db), name="Vaisseau"))
+    for column, (field, _) in SPEC_COLUMNS.items():
+        specs[column] = parse_spec_column(raw[field]) if field in raw else np.nan
+    return specs
+
+
+# --- 3. INDEX DE FACETTES (constructeur / rôle / nom / plages) ---
+
+class CatalogIndex:
+    """Index inversés constructeur / rôle -> noms, comptes par facette et ordres pré-triés par caractéristique."""
+
+    def __init__(self, ships_db: Dict[str, Any]):
+        self.names = list(ships_db)                          # ordre du catalogue (pagination)
+        self.position = {n: i for i, n in enumerate(self.names)}
+        self.sorted_names = sorted(self.names)
+        self.all_names = frozenset(self.names)
+        self.by_facet: Dict[str, Dict[str, frozenset]] = {"brand": {}, "role": {}}
+        for facet in self.by_facet:
+            groups: Dict[str, set] = {}
+            for name, data in ships_db.items():
+                if data.get(facet): groups.setdefault(data[facet], set()).add(name)
+            self.by_facet[facet] = {k: frozenset(v) for k, v in groups.items()}
+        self.brands = sorted(self.by_facet["brand"])
+        self.roles = sorted(self.by_facet["role"])
+        # Par caractéristique : positions triées par valeur (NaN en fin), valeurs triées, rangs asc./desc.
+        self.specs = build_spec_frame(ships_db)
+        self._names_arr = np.array(self.names, dtype=object)
+        self._order, self._sorted, self._rank = {}, {}, {}
+        n = len(self.names)
+        for column in SPEC_COLUMNS:
+            values = self.specs[column].to_numpy()
+            order = np.argsort(values, kind="stable")
+            n_valid = int(np.count_nonzero(~np.isnan(values)))
+            asc = np.empty(n, dtype=np.int64); asc[order] = np.arange(n)
+            desc = np.where(asc < n_valid, n_valid - 1 - asc, asc)
+            self._order[column] = order
+            self._sorted[column] = values[order[:n_valid]]
+            self._rank[column] = (asc, desc)
+
+    def bounds(self, column: str):
+        """(min, max) des valeurs connues de `column`, ou None si aucune."""
+        values = self._sorted[column]
+        return (float(values[0]), float(values[-1])) if len(values) else None
+
+    def in_range(self, column: str, low: float, high: float) -> frozenset:
+        """Noms dont `column` est dans [low, high] : deux recherches dichotomiques sur les valeurs triées."""
+        values = self._sorted[column]
+        i = np.searchsorted(values, low, side="left")
+        j = np.searchsorted(values, high, side="right")
+        return frozenset(self._names_arr[self._order[column][i:j]])
+
+    def _match(self, brand=None, role=None, names=None, ranges=None) -> frozenset:
+        result = self.all_names
+        if brand: result = result & self.by_facet["brand"].get(brand, frozenset())
+        if role: result = result & self.by_facet["role"].get(role, frozenset())
+        if names: result = result & frozenset(names)
+        for column, (low, high) in (ranges or {}).items():
+            result = result & self.in_range(column, low, high)
+        return result
+
+    def filter(self, brand=None, role=None, names=None, ranges=None, sort=None, descending=False) -> list:
+        """Noms correspondant aux filtres (None/vide = pas de filtre) ; ordre du catalogue ou tri par `sort`."""
+        matched = self._match(brand, role, names, ranges)
+        if sort:
+            rank = self._rank[sort][1 if descending else 0]
+            return sorted(matched, key=lambda n: rank[self.position[n]])
+        return sorted(matched, key=self.position.__getitem__)
+
+    def counts(self, facet: str, brand=None, role=None, names=None, ranges=None) -> Dict[str, int]:
+        """Nombre de vaisseaux par valeur de `facet`, compte tenu des autres filtres actifs."""
+        base = self._match(None if facet == "brand" else brand, None if facet == "role" else role, names, ranges)
+        return {value: len(members & base) for value, members in self.by_facet[facet].items()}
@@ -0,0 +1,145 @@
+# compact.py
+"""Encodage compact du document DB (JSONBin) : flotte en colonnes, dictionnaires de chaînes par document,
+champs recopiés de SHIPS_DB omis puis recalculés au chargement, compression zlib + base85 optionnelle."""
+import base64
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+import ships_data
+
+FORMAT = "pf-columnar-1"
+PACKED_FORMAT = FORMAT + "+zlib85"
+ENCODINGS = ("json", "compact", "packed")
+
+DICT_COLUMNS = ("Vaisseau", "Propriétaire", "Source", "Assurance")
+FLAG_COLUMNS = ("FlightReady", "NeedCrew")
+# Champs morts : toujours écrits à ces valeurs par l'application
+DEAD_FIELDS = {"Visuel": "", "Prix": None}
+
+
+def _float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def derived_fields(ship_name: str) -> Dict[str, Any]:
+    """Champs d'une ligne de flotte recopiés du catalogue à l'ajout (cf. `submit_cart_batch`) ;
+    seulement les champs morts pour un vaisseau hors catalogue."""
+    info = ships_data.SHIPS_DB.get(ship_name)
+    if info is None: return dict(DEAD_FIELDS)
+    auec = info.get("auec_price")
+    return {
+        "Marque": info.get("brand", "N/A"), "Rôle": info.get("role", "Inconnu"), "Image": info.get("img", ""),
+        "Prix_USD": _float(info.get("price")), "Prix_aUEC": float(auec) if isinstance(auec, (int, float)) else 0.0,
+        "crew_max": info.get("crew_max", 1), **DEAD_FIELDS,
+    }
+
+
+# --- 1. FLOTTE EN COLONNES ---
+
+def encode_fleet(rows: List[dict]) -> Dict[str, Any]:
+    """Colonnes : ids en deltas, codes de dictionnaire, drapeaux en chaîne de 0/1, équipages et écarts au
+    catalogue (prix modifiés, vaisseau inconnu, champ inattendu) en listes creuses [indice, valeur]."""
+    dicts = {col: {} for col in DICT_COLUMNS}
+    codes = {col: [] for col in DICT_COLUMNS}
+    flags = {col: [] for col in FLAG_COLUMNS}
+    ids, crew, extra = [], [], []
+    derived_cache: Dict[str, Dict[str, Any]] = {}
+    previous = 0
+    for i, row in enumerate(rows):
+        ids.append(row["id"] - previous)
+        previous = row["id"]
+        for col in DICT_COLUMNS:
+            d = dicts[col]
+            codes[col].append(d.setdefault(row.get(col), len(d)))
+        for col in FLAG_COLUMNS:
+            flags[col].append("1" if row.get(col) else "0")
+        members = row.get("CrewList") or []
+        if members:
+            owners = dicts["Propriétaire"]
+            crew.append([i, [owners.setdefault(m, len(owners)) for m in members]])
+        name = row.get("Vaisseau")
+        if name not in derived_cache: derived_cache[name] = derived_fields(name)
+        derived = derived_cache[name]
+        diff = {}
+        for field, value in row.items():
+            if field in derived:
+                if value != derived[field] or type(value) is not type(derived[field]): diff[field] = value
+            elif field in FLAG_COLUMNS:
+                if not isinstance(value, bool): diff[field] = value
+            elif field not in DICT_COLUMNS and field not in ("id", "CrewList"):
+                diff[field] = value
+        if diff: extra.append([i, diff])
+    return {
+        "n": len(rows), "id": ids,
+        "dict": {col: list(d) for col, d in dicts.items()},
+        "codes": codes,
+        "flags": {col: "".join(values) for col, values in flags.items()},
+        "crew": crew, "extra": extra,
+    }
+
+
+def decode_fleet(data: Dict[str, Any]) -> List[dict]:
+    dicts, codes, flags = data["dict"], data["codes"], data["flags"]
+    names, owners, sources, insurances = (dicts[col] for col in DICT_COLUMNS)
+    derived = [derived_fields(name) for name in names]
+    ready, need = flags["FlightReady"], flags["NeedCrew"]
+    rows, ship_id = [], 0
+    for i, (delta, v, o, s, a) in enumerate(zip(data["id"], *(codes[col] for col in DICT_COLUMNS))):
+        ship_id += delta
+        rows.append({"id": ship_id, "Propriétaire": owners[o], "Vaisseau": names[v], **derived[v],
+                     "Source": sources[s], "Assurance": insurances[a],
+                     "FlightReady": ready[i] == "1", "NeedCrew": need[i] == "1", "CrewList": []})
+    for i, members in data["crew"]:
+        rows[i]["CrewList"] = [owners[m] for m in members]
+    for i, diff in data["extra"]:
+        rows[i].update(diff)
+    return rows
+
+
+# --- 2. DOCUMENT ---
+
+def encode_db(db: Dict[str, Any], encoding: str = "compact") -> Dict[str, Any]:
+    """Document à écrire : tel quel ("json"), flotte en colonnes ("compact"), ou colonnes compressées en
+    zlib puis base85 ("packed" ; seuls `revision` et `feed` restent lisibles en clair)."""
+    if encoding == "json": return db
+    if encoding not in ENCODINGS: raise ValueError(f"Encodage inconnu : {encoding}")
+    doc = {key: value for key, value in db.items() if key != "fleet"}
+    doc["format"] = FORMAT
+    doc["fleet"] = encode_fleet(db.get("fleet", []))
+    if encoding == "compact": return doc
+    raw = json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    packed = {"format": PACKED_FORMAT, "revision": db.get("revision", 0),
+              "packed": base64.b85encode(zlib.compress(raw, 6)).decode("ascii")}
+    if db.get("feed"): packed["feed"] = db["feed"]
+    return packed
+
+
+def decode_db(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse de `encode_db` ; un document sans `format` (JSON d'origine) est rendu tel quel."""
+    fmt = doc.get("format")
+    if fmt is None: return doc
+    if fmt == PACKED_FORMAT:
+        doc = json.loads(zlib.decompress(base64.b85decode(doc["packed"])))
+        fmt = doc.get("format")
+    if fmt != FORMAT: raise ValueError(f"Format de document inconnu : {fmt}")
+    db = {key: value for key, value in doc.items() if key != "format"}
+    db["fleet"] = decode_fleet(doc["fleet"])
+    return db
+
+
+# --- 3. LOTS DU FLUX DE MODIFICATIONS ---
+
+def encode_changes(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Lot sérialisé (`ChangeSet.to_dict`) avec ses lignes en colonnes ; None (sauvegarde complète) inchangé."""
+    if not data or not data.get("upserts"): return data
+    return {**data, "upserts": encode_fleet(data["upserts"])}
+
+
+def decode_changes(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Inverse de `encode_changes` ; un lot aux lignes en clair est rendu tel quel."""
+    if not data or isinstance(data.get("upserts", []), list): return data
+    return {**data, "upserts": decode_fleet(data["upserts"])}
@@ -0,0 +1,373 @@
+# fleet_repo.py
+"""Accès indexé à la flotte : index maintenus à chaque mutation pour des recherches en O(1)."""
+from collections import defaultdict
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import ChangeSet
+
+# Clé de regroupement des cartes du hangar
+GROUP_FIELDS = ("Propriétaire", "Vaisseau", "Source", "Assurance", "FlightReady", "NeedCrew")
+
+# Colonnes et types du DataFrame partagé par les pages
+FRAME_DTYPES = {
+    "id": "int64",
+    "Propriétaire": "category", "Vaisseau": "category", "Marque": "category", "Rôle": "category",
+    "Source": "category", "Assurance": "category",
+    "FlightReady": "bool", "NeedCrew": "bool",
+    "Prix_USD": "float32", "Prix_aUEC": "float32",
+    "crew_max": "int16",
+    "Image": "object",
+}
+
+# Taille de delta au-delà de laquelle une couche dérivée est aplatie dans une nouvelle base
+FLATTEN_MIN = 1024
+
+
+def _num(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_GONE = object()    # clé retirée dans une couche (masque la valeur de la base)
+
+
+class _Layered:
+    """Dict à deux niveaux : `base` partagé (jamais modifié) + `local` propre au dépôt (`_GONE` = retirée).
+    Les valeurs mutables (ensembles d'ids, totaux) sont copiées à leur première modification (`writable`)."""
+
+    def __init__(self, base: Optional[dict] = None):
+        self.base = base if base is not None else {}
+        self.local: dict = {}
+        self.owned: set = set()     # clés de `local` dont la valeur n'est partagée avec aucune autre couche
+        self._len = len(self.base)
+
+    def fork(self) -> "_Layered":
+        """Couche fille : même base, `local` copié (valeurs partagées jusqu'à leur modification). Aplatie dans
+        une nouvelle base quand le delta dépasse 1/8 de la base, pour que lectures et copies restent courtes."""
+        child = _Layered()
+        if len(self.local) > max(FLATTEN_MIN, len(self.base) // 8):
+            child.base = dict(self.items())
+        else:
+            child.base, child.local = self.base, dict(self.local)
+        child._len = self._len
+        self.owned = set()          # les valeurs sont désormais partagées avec la fille
+        return child
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is None: return self.base.get(key, default)
+        return default if value is _GONE else value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _GONE) is not _GONE
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        return (key for key, _ in self.items())
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Paires dans l'ordre de la base (valeurs remplacées sur place), puis les clés ajoutées."""
+        local = self.local
+        for key, value in self.base.items():
+            value = local.get(key, value)
+            if value is not _GONE: yield key, value
+        for key, value in local.items():
+            if value is not _GONE and key not in self.base: yield key, value
+
+    def values(self) -> Iterator:
+        return (value for _, value in self.items())
+
+    def set(self, key, value) -> None:
+        if key not in self: self._len += 1
+        self.local[key] = value
+        self.owned.add(key)
+
+    def pop(self, key):
+        value = self.get(key, _GONE)
+        if value is _GONE: raise KeyError(key)
+        if key in self.base: self.local[key] = _GONE
+        else: del self.local[key]
+        self.owned.discard(key)
+        self._len -= 1
+        return value
+
+    def writable(self, key, empty):
+        """Valeur de `key` modifiable par cette couche : copiée si partagée, créée par `empty()` si absente."""
+        if key in self.owned: return self.local[key]
+        current = self.get(key)
+        value = empty() if current is None else current.copy()
+        self.set(key, value)
+        return value
+
+
+class FleetAggregates:
+    """Totaux matérialisés (corpo, par pilote, par modèle), mis à jour en O(1) par ligne ajoutée/retirée."""
+    FIELDS = ("count", "usd", "auec", "ready")
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self.corp = dict.fromkeys(self.FIELDS, 0)
+        by_pilot: Dict[str, dict] = {}
+        by_model: Dict[str, dict] = {}
+        for row in rows:
+            delta = self._contribution(row)
+            for bucket in (self.corp, by_pilot.setdefault(row["Propriétaire"], dict.fromkeys(self.FIELDS, 0)),
+                           by_model.setdefault(row["Vaisseau"], dict.fromkeys(self.FIELDS, 0))):
+                for k, v in delta.items():
+                    bucket[k] += v
+        self.by_pilot = _Layered(by_pilot)
+        self.by_model = _Layered(by_model)
+
+    def fork(self) -> "FleetAggregates":
+        child = FleetAggregates()
+        child.corp = dict(self.corp)
+        child.by_pilot, child.by_model = self.by_pilot.fork(), self.by_model.fork()
+        return child
+
+    @staticmethod
+    def _contribution(row: dict) -> dict:
+        return {
+            "count": 1,
+            "usd": _num(row.get("Prix_USD")) if row.get("Source") == "STORE" else 0.0,
+            "auec": _num(row.get("Prix_aUEC")) if row.get("Source") == "INGAME" else 0.0,
+            "ready": 1 if row.get("FlightReady") else 0,
+        }
+
+    def _apply(self, row: dict, sign: int) -> None:
+        delta = self._contribution(row)
+        for k, v in delta.items():
+            self.corp[k] += sign * v
+        for index, key in ((self.by_pilot, row["Propriétaire"]), (self.by_model, row["Vaisseau"])):
+            bucket = index.writable(key, lambda: dict.fromkeys(self.FIELDS, 0))
+            for k, v in delta.items():
+                bucket[k] += sign * v
+            if bucket["count"] <= 0: index.pop(key)
+
+    def add(self, row: dict) -> None:
+        self._apply(row, 1)
+
+    def remove(self, row: dict) -> None:
+        self._apply(row, -1)
+
+    def pilot(self, pilot: str) -> dict:
+        return self.by_pilot.get(pilot, dict.fromkeys(self.FIELDS, 0))
+
+    def model(self, name: str) -> dict:
+        return self.by_model.get(name, dict.fromkeys(self.FIELDS, 0))
+
+    def verify(self, rows: List[dict]) -> List[str]:
+        """Compare aux totaux recalculés depuis zéro ; renvoie la liste des écarts (vide si cohérent)."""
+        fresh = FleetAggregates(rows)
+        errors = []
+        for label, mine, ref in (("corpo", {"*": self.corp}, {"*": fresh.corp}),
+                                 ("pilote", self.by_pilot, fresh.by_pilot),
+                                 ("modèle", self.by_model, fresh.by_model)):
+            for key in set(mine) | set(ref):
+                a, b = mine.get(key, {}), ref.get(key, {})
+                for f in self.FIELDS:
+                    if abs(a.get(f, 0) - b.get(f, 0)) > 1e-6:
+                        errors.append(f"{label} {key} {f}: {a.get(f, 0)} != {b.get(f, 0)}")
+        return errors
+
+
+def group_key(row: dict) -> Tuple:
+    return (row["Propriétaire"], row["Vaisseau"], row["Source"], row["Assurance"],
+            bool(row.get("FlightReady", False)), bool(row.get("NeedCrew", False)))
+
+
+class FleetRepository:
+    """Lignes de flotte par id (ordre de la flotte conservé, retrait en O(1)) et index propriétaire / groupe /
+    équipage. `fork` et `derive` donnent un dépôt qui partage ceux-ci : seules les clés modifiées ensuite
+    sont copiées, sans ré-indexer la flotte (cf. `_Layered`)."""
+
+    def __init__(self, rows: List[dict] = ()):
+        by_owner: Dict[str, Set] = defaultdict(set)
+        by_group: Dict[Tuple, Set] = defaultdict(set)
+        by_crew: Dict[str, Set] = defaultdict(set)
+        for row in rows:
+            sid = row["id"]
+            by_owner[row["Propriétaire"]].add(sid)
+            by_group[group_key(row)].add(sid)
+            for member in row.get("CrewList", []):
+                by_crew[member].add(sid)
+        self._rows = _Layered({row["id"]: row for row in rows})
+        self._by_owner = _Layered(dict(by_owner))
+        self._by_group = _Layered(dict(by_group))
+        self._by_crew = _Layered(dict(by_crew))
+        self.version = 0            # incrémenté à chaque mutation
+        self.aggregates = FleetAggregates(rows)
+        self._list = list(rows)
+        self._list_version = 0
+        self._frame = None
+        self._frame_version = -1
+        self._touched: Dict[Any, Optional[dict]] = {}   # lignes modifiées depuis `_frame` (None = retirée)
+
+    def fork(self) -> "FleetRepository":
+        """Dépôt dérivé modifiable ; celui-ci ne doit plus être modifié ensuite (lecture seule)."""
+        child = FleetRepository()
+        child._rows, child._by_owner = self._rows.fork(), self._by_owner.fork()
+        child._by_group, child._by_crew = self._by_group.fork(), self._by_crew.fork()
+        child.aggregates = self.aggregates.fork()
+        child.version = self.version
+        child._list, child._list_version = self._list, self._list_version
+        child._frame, child._frame_version, child._touched = self._frame, self._frame_version, dict(self._touched)
+        return child
+
+    def derive(self, changes: ChangeSet, rows: Optional[List[dict]] = None) -> "FleetRepository":
+        """Dépôt de la révision suivante = celui-ci + `changes` ; `rows` : la flotte résultante si déjà
+        construite (cf. `apply_changes`, même ordre)."""
+        child = self.fork()
+        for ship_id in changes.deletes:
+            if ship_id in child: child.remove(ship_id)
+        for row in changes.upserts.values():
+            child.put(row)
+        if rows is not None: child._list, child._list_version = rows, child.version
+        return child
+
+    # --- Index ---
+    def _index(self, row: dict) -> None:
+        sid = row["id"]
+        self._by_owner.writable(row["Propriétaire"], set).add(sid)
+        self._by_group.writable(group_key(row), set).add(sid)
+        for member in row.get("CrewList", []):
+            self._by_crew.writable(member, set).add(sid)
+        self.aggregates.add(row)
+
+    def _unindex(self, row: dict) -> None:
+        sid = row["id"]
+        _discard(self._by_owner, row["Propriétaire"], sid)
+        _discard(self._by_group, group_key(row), sid)
+        for member in row.get("CrewList", []):
+            _discard(self._by_crew, member, sid)
+        self.aggregates.remove(row)
+
+    def _touch(self, ship_id, row: Optional[dict]) -> None:
+        self.version += 1
+        if self._frame is not None: self._touched[ship_id] = row
+
+    # --- Lecture ---
+    @property
+    def rows(self) -> List[dict]:
+        """Lignes dans l'ordre de la flotte (liste reconstruite au plus une fois par version, lecture seule)."""
+        if self._list_version != self.version:
+            self._list = list(self._rows.values())
+            self._list_version = self.version
+        return self._list
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, ship_id):
+        return ship_id in self._rows
+
+    def get(self, ship_id) -> Optional[dict]:
+        return self._rows.get(ship_id)
+
+    def ids_for_owner(self, owner: str) -> Set:
+        return set(self._by_owner.get(owner, ()))
+
+    def ids_for_group(self, key: Tuple) -> Set:
+        return set(self._by_group.get(key, ()))
+
+    def ids_for_crew(self, member: str) -> Set:
+        return set(self._by_crew.get(member, ()))
+
+    def rows_for_owner(self, owner: str) -> List[dict]:
+        return [self._rows.get(i) for i in self._by_owner.get(owner, ())]
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame typé de la flotte, mis à jour quand `version` a changé : seules les lignes modifiées
+        depuis le précédent sont converties (cf. `patch_fleet_frame`). Lecture seule."""
+        if self._frame_version != self.version:
+            if self._frame is None or len(self._touched) > len(self._rows) // 4:
+                self._frame = build_fleet_frame(self.rows)
+            else: self._frame = patch_fleet_frame(self._frame, self._touched)
+            self._frame_version = self.version
+            self._touched = {}
+        return self._frame
+
+    # --- Mutations ---
+    def add(self, row: dict) -> dict:
+        if row["id"] in self._rows:
+            raise KeyError(f"id déjà présent : {row['id']}")
+        self._touch(row["id"], row)
+        self._rows.set(row["id"], row)
+        self._index(row)
+        return row
+
+    def put(self, row: dict) -> dict:
+        """Ajoute la ligne ou remplace celle de même id (à sa place dans la flotte)."""
+        old = self._rows.get(row["id"])
+        if old is None: return self.add(row)
+        self._touch(row["id"], row)
+        self._unindex(old)
+        self._rows.set(row["id"], row)
+        self._index(row)
+        return row
+
+    def update(self, ship_id, **fields) -> dict:
+        """Remplace la ligne par une copie modifiée (l'ancienne peut être partagée) et ré-indexe cette ligne."""
+        old = self._rows.get(ship_id)
+        if old is None: raise KeyError(ship_id)
+        return self.put({**old, **fields})
+
+    def remove(self, ship_id) -> dict:
+        """Supprime une ligne en O(1) ; les autres gardent leur ordre (cartes et tableaux stables)."""
+        row = self._rows.pop(ship_id)
+        self._touch(ship_id, None)
+        self._unindex(row)
+        return row
+
+    def remove_owner(self, owner: str) -> List[dict]:
+        return [self.remove(i) for i in self.ids_for_owner(owner)]
+
+
+def _discard(index: _Layered, key, sid) -> None:
+    if sid in index.get(key, ()):
+        ids = index.writable(key, set)
+        ids.discard(sid)
+        if not ids: index.pop(key)
+
+
+def build_fleet_frame(rows: List[dict]) -> pd.DataFrame:
+    """Construit le DataFrame typé (catégories, booléens, float32) à partir des lignes de flotte."""
+    df = pd.DataFrame.from_records(rows, columns=list(FRAME_DTYPES))
+    df["FlightReady"] = df["FlightReady"].fillna(False)
+    df["NeedCrew"] = df["NeedCrew"].fillna(False)
+    df["crew_max"] = pd.to_numeric(df["crew_max"], errors="coerce").fillna(1)
+    df["Prix_USD"] = pd.to_numeric(df["Prix_USD"], errors="coerce").fillna(0)
+    df["Prix_aUEC"] = pd.to_numeric(df["Prix_aUEC"], errors="coerce").fillna(0)
+    return df.astype(FRAME_DTYPES)
+
+
+def patch_fleet_frame(df: pd.DataFrame, changes: Dict[Any, Optional[dict]]) -> pd.DataFrame:
+    """Nouveau DataFrame = `df` + lignes modifiées (`None` = supprimée), sans modifier `df` : lignes
+    remplacées à leur place, ajouts en fin, mêmes types et catégories triées que `build_fleet_frame`."""
+    if not changes: return df
+    pos = pd.Index(df["id"]).get_indexer(list(changes))
+    rows = list(changes.values())
+    replaced = [(p, row) for p, row in zip(pos, rows) if p >= 0 and row is not None]
+    added = [row for p, row in zip(pos, rows) if p < 0 and row is not None]
+    patch = build_fleet_frame([row for _, row in replaced] + added)
+    df = df.copy(deep=False)
+    for col, dtype in FRAME_DTYPES.items():
+        if dtype != "category": continue
+        categories = df[col].cat.categories.union(patch[col].cat.categories)
+        df[col] = df[col].cat.set_categories(categories)
+        patch[col] = patch[col].cat.set_categories(categories)
+    n = len(df)
+    take = np.arange(n)
+    for j, (p, _) in enumerate(replaced): take[p] = n + j
+    keep = np.ones(n, dtype=bool)
+    keep[[p for p, row in zip(pos, rows) if p >= 0 and row is None]] = False
+    take = np.concatenate([take[keep], np.arange(n + len(replaced), n + len(patch))])
+    out = pd.concat([df, patch], ignore_index=True).take(take).reset_index(drop=True)
+    for col, dtype in FRAME_DTYPES.items():
+        if dtype == "category": out[col] = out[col].cat.remove_unused_categories()
+    return out
@@ -0,0 +1,222 @@
+# images.py
+"""Miniatures pré-dimensionnées des visuels de vaisseaux + cache mémoire borné (LRU)."""
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from PIL import Image
+
+THUMB_QUALITY = 70
+THUMB_CACHE_DIR = os.path.join(".cache", "thumbs")
+
+
+# --- 1. CACHE MÉMOIRE BORNÉ ---
+
+class LRUBytesCache:
+    """Cache LRU borné en nombre d'entrées et en octets (thread-safe)."""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._data: "OrderedDict[object, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: str) -> None:
+        size = len(value)
+        if size > self.max_bytes: return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None: self._bytes -= len(old)
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+IMAGE_CACHE = LRUBytesCache()
+
+
+# --- 2. MINIATURES SUR DISQUE (adressées par contenu) ---
+
+def _source_key(path: str, height: int) -> Optional[str]:
+    """Clé de cache : chemin + mtime + taille du fichier source + paramètres de rendu."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{height}|{THUMB_QUALITY}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_thumbnail(path: str, height: int) -> Optional[str]:
+    """Construit (une seule fois) la miniature webp de `path` à la hauteur donnée ; renvoie son chemin."""
+    key = _source_key(path, height)
+    if key is None: return None
+    out = os.path.join(THUMB_CACHE_DIR, f"{key}.webp")
+    if os.path.exists(out): return out
+    try:
+        with Image.open(path) as im:
+            im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+            if im.height > height:
+                im.thumbnail((max(1, im.width * height // im.height), height), Image.LANCZOS)
+            buf = io.BytesIO()
+            im.save(buf, "WEBP", quality=THUMB_QUALITY, method=4)
+    except Exception:
+        return None
+    os.makedirs(THUMB_CACHE_DIR, exist_ok=True)
+    tmp = f"{out}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf.getvalue())
+    os.replace(tmp, out)
+    return out
+
+
+# --- 3. DATA URI ---
+
+def file_as_data_uri(path: str) -> str:
+    """Contenu brut de `path` en data URI, avec le type MIME réel du fichier."""
+    if not path or not os.path.exists(path): return ""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return ""
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def get_thumbnail_data_uri(path: str, height: int) -> str:
+    """Miniature de `path` (hauteur `height`) en data URI, via le cache LRU."""
+    cache_key = _source_key(path, height) if path else None
+    if cache_key is None: return ""
+    cached = IMAGE_CACHE.get(cache_key)
+    if cached is not None: return cached
+    thumb = build_thumbnail(path, height)
+    uri = file_as_data_uri(thumb) if thumb else file_as_data_uri(path)
+    if uri: IMAGE_CACHE.put(cache_key, uri)
+    return uri
+
+
+# --- 4. SERVICE STATIQUE (/app/static, noms hachés) ---
+
+STATIC_DIR = "static"
+STATIC_URL_PREFIX = "app/static"
+
+
+def _slug(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    return "".join(c if c.isalnum() else "-" for c in stem).strip("-") or "img"
+
+
+def publish_static(path: str, stem: str) -> Optional[str]:
+    """Copie `path` dans static/ sous un nom incluant le hash de son contenu ; renvoie l'URL servie."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    name = f"{stem}.{hashlib.sha1(data).hexdigest()[:12]}{os.path.splitext(path)[1].lower()}"
+    out = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(out):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = f"{out}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, out)
+    return f"{STATIC_URL_PREFIX}/{name}"
+
+
+def build_asset_manifest(paths) -> dict:
+    """Manifeste des visuels : chemin source -> existence, URL du fichier complet et URL par miniature.
+    Seuls les fichiers complets sont publiés ici ; les miniatures s'ajoutent à la demande
+    (`static_thumbnail_url`)."""
+    manifest = {}
+    for path in dict.fromkeys(p for p in paths if p):
+        entry = {"exists": os.path.exists(path), "full": "", "thumbs": {}}
+        if entry["exists"]: entry["full"] = publish_static(path, _slug(path)) or ""
+        manifest[path] = entry
+    return manifest
+
+
+def publish_thumbnail(entry: dict, path: str, height: int) -> Optional[str]:
+    """Construit et publie la miniature de `path`, puis l'ajoute à l'entrée du manifeste."""
+    thumb = build_thumbnail(path, height)
+    url = publish_static(thumb, f"{_slug(path)}-{height}") if thumb else None
+    if url: entry["thumbs"][height] = url
+    return url
+
+
+# --- 5. PRÉCHARGEMENT EN ARRIÈRE-PLAN ---
+
+PREFETCH_WORKERS = 2
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="thumb-prefetch")
+_PENDING: Dict[tuple, Future] = {}
+_PENDING_LOCK = threading.RLock()
+
+
+def _forget(key: tuple) -> None:
+    with _PENDING_LOCK:
+        _PENDING.pop(key, None)
+
+
+def _submit(key: tuple, fn, *args) -> Future:
+    """Tâche `fn(*args)` sur le pool ; une seule tâche par clé en cours."""
+    with _PENDING_LOCK:
+        future = _PENDING.get(key)
+        if future is None:
+            future = _PENDING[key] = _PREFETCH_POOL.submit(fn, *args)
+            future.add_done_callback(lambda _f, k=key: _forget(k))
+    return future
+
+
+def wait_background(timeout: Optional[float] = None) -> None:
+    """Attend la fin des tâches lancées sur le pool (benchmarks : mesures sans construction en cours)."""
+    with _PENDING_LOCK:
+        futures = list(_PENDING.values())
+    for future in futures:
+        future.exception(timeout)
+
+
+def prefetch_thumbnails(paths, height: int) -> Dict[str, Future]:
+    """Prépare en arrière-plan les miniatures (data URI) de `paths` ; une seule tâche par image en cours."""
+    return {path: _submit((path, height), get_thumbnail_data_uri, path, height)
+            for path in dict.fromkeys(p for p in paths if p)}
+
+
+def static_thumbnail_url(manifest: dict, path: str, height: int) -> Optional[str]:
+    """URL statique de la miniature de `path` ; None tant qu'elle n'est pas publiée (construction lancée en
+    arrière-plan, le fichier complet sert en attendant)."""
+    entry = manifest.get(path)
+    if entry is None or not entry["exists"]: return None
+    url = entry["thumbs"].get(height)
+    if url is None: _submit(("static", path, height), publish_thumbnail, entry, path, height)
+    return url
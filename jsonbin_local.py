@@ -0,0 +1,183 @@
+# jsonbin_local.py
+"""Serveur HTTP local imitant les routes JSONBin v3 utilisées par l'application.
+
+    python jsonbin_local.py --port 8765 --key dev --latency 0.08 --bandwidth 2000000 --size-limit 1048576
+
+Puis dans `.streamlit/secrets.toml` : JSONBIN_URL = "http://127.0.0.1:8765/v3", JSONBIN_KEY = "dev".
+"""
+import argparse
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+BIN_RE = re.compile(r"^/v3/b/([^/?]+)(/latest)?/?$")
+CREATE_RE = re.compile(r"^/v3/b/?$")
+
+
+class LocalJsonBin:
+    """Bins en mémoire servis sur /v3/b (POST, création), /v3/b/{id} (PUT, DELETE) et /v3/b/{id}[/latest] (GET).
+
+    `latency` (s) est ajoutée à chaque réponse, `bandwidth` (octets/s, None = illimité) s'applique aux
+    corps envoyés et reçus, `size_limit` (octets) renvoie 403 comme JSONBin au-delà de la limite du plan.
+    """
+
+    def __init__(self, master_key: str = "dev", host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, bandwidth: Optional[float] = None, size_limit: Optional[int] = None,
+                 create_on_put: bool = True):
+        self.master_key = master_key
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.size_limit = size_limit
+        self.create_on_put = create_on_put      # JSONBin répond 404 ; pratique pour un bin neuf en local
+        self.bins: Dict[str, Any] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def start(self) -> "LocalJsonBin":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="jsonbin-local", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def throttle(self, n_bytes: int) -> None:
+        if self.bandwidth: time.sleep(n_bytes / self.bandwidth)
+
+
+def _make_handler(app: LocalJsonBin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"          # keep-alive, comme l'API réelle
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzipped: body = gzip.compress(body, compresslevel=5)
+            time.sleep(app.latency)
+            app.throttle(len(body))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if gzipped: self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, pattern=BIN_RE):
+            with app._lock:
+                app.requests += 1
+            match = pattern.match(self.path)
+            if not match:
+                self._reply(404, {"message": "Route not found"})
+                return None
+            if self.headers.get("X-Master-Key") != app.master_key:
+                self._reply(401, {"message": "You need to pass X-Master-Key in the header"})
+                return None
+            return match
+
+        def do_GET(self):
+            match = self._route()
+            if not match: return
+            bin_id = match.group(1)
+            with app._lock:
+                record = app.bins.get(bin_id)
+            if record is None: return self._reply(404, {"message": "Bin not found or it doesn't belong to your Master Key"})
+            self._reply(200, {"record": record, "metadata": {"id": bin_id, "private": True}})
+
+        def _read_record(self):
+            """Corps JSON de la requête ; None après avoir répondu en erreur."""
+            raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            app.throttle(len(raw))
+            if self.headers.get("Content-Encoding") == "gzip": raw = gzip.decompress(raw)
+            if not self.headers.get("Content-Type", "").startswith("application/json"):
+                return self._reply(400, {"message": "You need to pass Content-Type set to application/json"})
+            if app.size_limit is not None and len(raw) > app.size_limit:
+                return self._reply(403, {"message": f"Requests can not exceed {app.size_limit} bytes. Upgrade your plan."})
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return self._reply(400, {"message": "Invalid JSON"})
+
+        def do_POST(self):
+            if not self._route(CREATE_RE): return
+            record = self._read_record()
+            if record is None: return
+            bin_id = uuid.uuid4().hex[:24]
+            with app._lock:
+                app.bins[bin_id] = record
+            self._reply(200, {"record": record, "metadata": {"id": bin_id, "private": True}})
+
+        def do_DELETE(self):
+            match = self._route()
+            if not match: return
+            with app._lock:
+                found = app.bins.pop(match.group(1), None) is not None
+            if not found: return self._reply(404, {"message": "Bin not found or it doesn't belong to your Master Key"})
+            self._reply(200, {"metadata": {"id": match.group(1)}, "message": "Bin deleted successfully"})
+
+        def do_PUT(self):
+            match = self._route()
+            if not match: return
+            bin_id = match.group(1)
+            if match.group(2):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                return self._reply(404, {"message": "Route not found"})
+            record = self._read_record()
+            if record is None: return
+            with app._lock:
+                if bin_id not in app.bins and not app.create_on_put:
+                    record = None
+                else:
+                    app.bins[bin_id] = record
+            if record is None: return self._reply(404, {"message": "Bin not found or it doesn't belong to your Master Key"})
+            self._reply(200, {"record": record, "metadata": {"parentId": bin_id, "private": True}})
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur JSONBin v3 local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--key", default="dev", help="X-Master-Key attendue")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence ajoutée par réponse (s)")
+    parser.add_argument("--bandwidth", type=float, default=None, help="débit en octets/s (défaut illimité)")
+    parser.add_argument("--size-limit", type=int, default=None, help="taille max d'un PUT en octets (403 au-delà)")
+    parser.add_argument("--seed", help="fichier JSON chargé dans le bin --bin")
+    parser.add_argument("--bin", default="local")
+    args = parser.parse_args()
+    server = LocalJsonBin(args.key, args.host, args.port, args.latency, args.bandwidth, args.size_limit)
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            server.bins[args.bin] = json.load(f)
+    print(f"JSONBin local sur {server.url} (bin '{args.bin}', clé '{args.key}')")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
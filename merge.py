@@ -0,0 +1,76 @@
+# merge.py
+"""Fusion à trois voies des lots de modifications : un lot écrit sur une base périmée est réécrit pour
+s'appliquer après les modifications faites ailleurs depuis cette base."""
+from typing import Any, Dict, List, Optional
+
+from storage import ChangeSet
+
+DOC_SECTIONS = ("fleet", "users", "user_data", "revision")
+
+
+def merge_members(base: List[str], ours: List[str], theirs: List[str], limit: Optional[int] = None) -> List[str]:
+    """CrewList en ensemble : départs et arrivées des deux côtés ; nos arrivées s'arrêtent à `limit` places."""
+    left = set(base) - set(ours)
+    merged = [m for m in theirs if m not in left]
+    for member in ours:
+        if member in base or member in merged: continue
+        if limit is not None and len(merged) >= limit: break
+        merged.append(member)
+    return merged
+
+
+def merge_row(base: dict, ours: dict, theirs: dict) -> dict:
+    """Champ par champ : nos champs modifiés depuis `base` l'emportent, les autres viennent de `theirs`."""
+    merged = dict(theirs)
+    for field in set(base) | set(ours):
+        if field == "CrewList":
+            limit = merged.get("crew_max")
+            merged[field] = merge_members(base.get(field) or [], ours.get(field) or [], theirs.get(field) or [],
+                                          limit if isinstance(limit, int) else None)
+        elif field not in ours:
+            if field in base: merged.pop(field, None)
+        elif field not in base or ours[field] != base[field]:
+            merged[field] = ours[field]
+    return merged
+
+
+def rebase(ours: ChangeSet, base: Dict[str, Any], theirs: ChangeSet) -> ChangeSet:
+    """`ours` (écrit sur `base`) réécrit pour passer après `theirs` (écrit ailleurs sur la même base).
+    Une ligne supprimée d'un côté reste supprimée ; comptes et codes : notre valeur l'emporte."""
+    rebased = ChangeSet()
+    touched = set(ours.upserts) & set(theirs.upserts)
+    base_rows = {row["id"]: row for row in base.get("fleet", []) if row["id"] in touched} if touched else {}
+    for ship_id in ours.deletes: rebased.delete_ship(ship_id)
+    for ship_id, row in ours.upserts.items():
+        if ship_id in theirs.deletes: continue
+        if ship_id in touched and ship_id in base_rows:
+            row = merge_row(base_rows[ship_id], row, theirs.upserts[ship_id])
+        rebased.upsert_ship(row)
+    rebased.users.update(ours.users)
+    base_data = base.get("user_data", {})
+    for pilot, data in ours.user_data.items():
+        if data is not None and pilot in theirs.user_data:
+            their_data = theirs.user_data[pilot]
+            if their_data is None: continue         # compte supprimé ailleurs
+            if pilot in base_data: data = merge_row(base_data[pilot], data, their_data)
+        rebased.user_data[pilot] = data
+    rebased.meta.update(ours.meta)
+    return rebased
+
+
+def diff_db(base: Dict[str, Any], latest: Dict[str, Any]) -> ChangeSet:
+    """Lot qui transforme `base` en `latest` (quand le flux de modifications ne couvre pas l'écart)."""
+    changes = ChangeSet()
+    base_rows = {row["id"]: row for row in base.get("fleet", [])}
+    latest_ids = set()
+    for row in latest.get("fleet", []):
+        latest_ids.add(row["id"])
+        if base_rows.get(row["id"]) != row: changes.upsert_ship(row)
+    for ship_id in base_rows.keys() - latest_ids: changes.delete_ship(ship_id)
+    for key, target in (("users", changes.users), ("user_data", changes.user_data)):
+        old, new = base.get(key, {}), latest.get(key, {})
+        for pilot in old.keys() | new.keys():
+            if old.get(pilot) != new.get(pilot): target[pilot] = new.get(pilot)
+    for key, value in latest.items():
+        if key not in DOC_SECTIONS and base.get(key) != value: changes.set_meta(key, value)
+    return changes
@@ -0,0 +1,66 @@
+# migrations.py
+"""Migrations versionnées du document DB : appliquées une seule fois au chargement, puis persistées."""
+import time
+from typing import Callable, Dict, Any, List, Tuple
+
+from storage import DEFAULT_META
+
+SCHEMA_VERSION = 3
+
+# Valeurs par défaut des lignes de flotte (schéma 1)
+FLEET_DEFAULTS = {
+    "Propriétaire": "INCONNU", "Vaisseau": "Inconnu", "Marque": "N/A", "Rôle": "Inconnu",
+    "FlightReady": False, "Image": "", "Visuel": "", "Source": "STORE",
+    "Prix_USD": 0.0, "Prix_aUEC": 0.0, "Assurance": "Standard", "Prix": None, "crew_max": 1,
+}
+
+
+def _v1_structure(db: Dict[str, Any]) -> None:
+    """Clés racine, champs de flotte par défaut, `Dispo` remplacé par `FlightReady`."""
+    for key, value in DEFAULT_META.items():
+        db.setdefault(key, value)
+    db.setdefault("users", {})
+    db.setdefault("fleet", [])
+    db.setdefault("user_data", {})
+    base_id = int(time.time() * 1_000_000)
+    for i, ship in enumerate(db["fleet"]):
+        ship.setdefault("id", base_id + i)
+        if "Dispo" in ship: ship["FlightReady"] = ship.pop("Dispo")
+        for field, value in FLEET_DEFAULTS.items():
+            ship.setdefault(field, value)
+
+
+def _v2_need_crew(db: Dict[str, Any]) -> None:
+    """Recherche d'équipage : `NeedCrew` et `CrewList` sur chaque ligne."""
+    for ship in db["fleet"]:
+        ship.setdefault("NeedCrew", False)
+        ship.setdefault("CrewList", [])
+
+
+def _v3_user_data(db: Dict[str, Any]) -> None:
+    """Données pilote (solde aUEC, objectif) pour chaque utilisateur."""
+    for pilot in db["users"]:
+        db["user_data"].setdefault(pilot, {"auec_balance": 0, "acquisition_target": None})
+
+
+# (version atteinte, migration) dans l'ordre ; ne jamais modifier une entrée publiée, en ajouter une.
+MIGRATIONS: List[Tuple[int, Callable[[Dict[str, Any]], None]]] = [
+    (1, _v1_structure),
+    (2, _v2_need_crew),
+    (3, _v3_user_data),
+]
+
+
+def schema_version(db: Dict[str, Any]) -> int:
+    return int(db.get("schema_version", 0) or 0)
+
+
+def migrate(db: Dict[str, Any]) -> bool:
+    """Applique en place les migrations manquantes et tamponne `schema_version` ; True si `db` a changé."""
+    current = schema_version(db)
+    if current >= SCHEMA_VERSION: return False
+    for version, step in MIGRATIONS:
+        if version > current:
+            step(db)
+            db["schema_version"] = version
+    return True
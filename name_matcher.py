@@ -0,0 +1,83 @@
+# name_matcher.py
+"""Normalisation des noms de vaisseaux et rapprochement catalogue <-> scrap.json par ensembles de tokens."""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Alias au niveau du token (fautes de frappe du catalogue, noms collés)
+TOKEN_ALIASES = {
+    "honrnet": ("hornet",), "femini": ("gemini",), "emerlad": ("emerald",),
+    "cosntellation": ("constellation",), "carterpillar": ("caterpillar",),
+    "nautilius": ("nautilus",), "herarld": ("herald",), "scrythe": ("scythe",),
+    "stringer": ("stinger",), "golemx": ("golem",), "hullc": ("hull", "c"),
+    "kx": ("lx",), "ai": ("al",),
+}
+
+
+def tokenize(name: str) -> Tuple[str, ...]:
+    """Tokens normalisés : minuscules, accents retirés, séparateurs ignorés, alias appliqués."""
+    folded = unicodedata.normalize("NFKD", name.lower()).encode("ascii", "ignore").decode("ascii")
+    tokens = []
+    for tok in TOKEN_RE.findall(folded):
+        tokens.extend(TOKEN_ALIASES.get(tok, (tok,)))
+    return tuple(tokens)
+
+
+class MatchReport:
+    """Bilan d'un rapprochement : correspondances, noms sans correspondance, cas ambigus."""
+
+    def __init__(self):
+        self.matched: Dict[str, Tuple[str, str]] = {}          # nom -> (titre scrap, "exact" | "base")
+        self.unmatched: List[str] = []
+        self.ambiguous: Dict[str, List[str]] = {}              # nom -> titres candidats
+
+    def lines(self) -> List[str]:
+        base = sorted(n for n, (_, kind) in self.matched.items() if kind == "base")
+        out = [f"Correspondances : {len(self.matched)} ({len(base)} via le modèle de base)"]
+        if base: out.append("Modèle de base : " + ", ".join(f"{n} -> {self.matched[n][0]}" for n in base))
+        if self.unmatched: out.append("Sans correspondance : " + ", ".join(self.unmatched))
+        if self.ambiguous: out.append("Ambigus : " + "; ".join(f"{n} ({' / '.join(c)})" for n, c in self.ambiguous.items()))
+        return out
+
+
+class NameMatcher:
+    """Index des titres scrap par ensemble de tokens + index inversé token -> ensembles."""
+
+    def __init__(self, titles: Iterable[str]):
+        self.by_tokens: Dict[FrozenSet[str], List[str]] = defaultdict(list)
+        self.by_token: Dict[str, set] = defaultdict(set)
+        for title in titles:
+            key = frozenset(tokenize(title))
+            if not key: continue
+            if title not in self.by_tokens[key]: self.by_tokens[key].append(title)
+            for tok in key:
+                self.by_token[tok].add(key)
+
+    def resolve(self, name: str) -> Tuple[Optional[str], str, List[str]]:
+        """(titre, type, candidats) ; type = "exact", "base" (variante -> modèle de base), "ambiguous" ou "none"."""
+        key = frozenset(tokenize(name))
+        exact = self.by_tokens.get(key)
+        if exact:
+            return (exact[0], "exact", exact) if len(exact) == 1 else (None, "ambiguous", exact)
+        # Modèle de base : plus grand ensemble de tokens scrap entièrement contenu dans le nom
+        hits: Dict[FrozenSet[str], int] = defaultdict(int)
+        for tok in key:
+            for candidate in self.by_token.get(tok, ()):
+                hits[candidate] += 1
+        subsets = [k for k, n in hits.items() if n == len(k)]
+        if not subsets: return None, "none", []
+        size = max(len(k) for k in subsets)
+        best = [t for k in subsets if len(k) == size for t in self.by_tokens[k]]
+        return (best[0], "base", best) if len(best) == 1 else (None, "ambiguous", best)
+
+    def match_all(self, names: Iterable[str]) -> MatchReport:
+        report = MatchReport()
+        for name in names:
+            title, kind, candidates = self.resolve(name)
+            if title: report.matched[name] = (title, kind)
+            elif kind == "ambiguous": report.ambiguous[name] = candidates
+            else: report.unmatched.append(name)
+        return report
@@ -0,0 +1,91 @@
+# perf.py
+"""Chronométrage léger des reruns : spans par étape, tampons circulaires par étape et par session."""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STAGE_SAMPLES = 500      # mesures conservées par étape
+RERUN_SAMPLES = 200      # reruns complets conservés
+
+
+class Rerun:
+    """Un rerun de script : durée de chaque étape (ms), cumulée si l'étape se répète."""
+    __slots__ = ("session", "label", "start", "stages", "total_ms", "at")
+
+    def __init__(self, session: str):
+        self.session = session
+        self.label = ""
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.total_ms: Optional[float] = None
+        self.at = time.time()
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + 1000 * (time.perf_counter() - start)
+
+
+class PerfRecorder:
+    """Tampons circulaires partagés par le processus ; les statistiques ne sont calculées qu'à la lecture."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, deque] = defaultdict(lambda: deque(maxlen=STAGE_SAMPLES))   # étape -> (session, ms)
+        self._reruns: deque = deque(maxlen=RERUN_SAMPLES)
+        self._open: Dict[str, Rerun] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def begin(self, session: str) -> Rerun:
+        """Ouvre un rerun ; un rerun précédent de la session resté ouvert est clos au passage."""
+        rerun = Rerun(session)
+        with self._lock:
+            previous = self._open.pop(session, None)
+            self._open[session] = rerun
+        if previous is not None: self.end(previous)
+        return rerun
+
+    def end(self, rerun: Rerun) -> None:
+        if rerun.total_ms is not None: return
+        rerun.total_ms = 1000 * (time.perf_counter() - rerun.start)
+        with self._lock:
+            if self._open.get(rerun.session) is rerun: del self._open[rerun.session]
+            for stage, ms in rerun.stages.items():
+                self._stages[stage].append((rerun.session, ms))
+            self._stages["rerun"].append((rerun.session, rerun.total_ms))
+            self._reruns.append(rerun)
+
+    def record(self, stage: str, session: str, ms: float) -> None:
+        """Mesure faite hors d'un rerun (ex. envoi par la file d'écriture)."""
+        with self._lock:
+            self._stages[stage].append((session, ms))
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def stage_stats(self, session: Optional[str] = None) -> List[dict]:
+        """p50 / p95 / max par étape (toutes sessions, ou une seule)."""
+        with self._lock:
+            samples = {stage: [ms for s, ms in values if session is None or s == session] for stage, values in self._stages.items()}
+        rows = []
+        for stage, values in samples.items():
+            if not values: continue
+            arr = np.asarray(values)
+            rows.append({"étape": stage, "n": len(arr), "p50 (ms)": float(np.percentile(arr, 50)),
+                         "p95 (ms)": float(np.percentile(arr, 95)), "max (ms)": float(arr.max())})
+        return sorted(rows, key=lambda r: -r["p95 (ms)"])
+
+    def slowest(self, n: int = 10, session: Optional[str] = None) -> List[Rerun]:
+        with self._lock:
+            reruns = [r for r in self._reruns if session is None or r.session == session]
+        return sorted(reruns, key=lambda r: -r.total_ms)[:n]
+
+
+PERF = PerfRecorder()
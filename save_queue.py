@@ -0,0 +1,185 @@
+# save_queue.py
+"""File d'écriture différée : regroupe les sauvegardes d'une fenêtre de temps en un seul envoi au backend."""
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from merge import diff_db, rebase
+from storage import (ChangeSet, ConflictError, StorageBackend, StorageSizeLimitError, apply_changes, doc_revision,
+                     snapshot_db)
+
+DEBOUNCE_SECONDS = 0.5
+MAX_DELAY_SECONDS = 3.0      # une rafale continue n'attend jamais plus longtemps
+RETRY_SECONDS = 2.0          # relance d'un envoi en échec, doublée à chaque échec consécutif
+RETRY_MAX_SECONDS = 60.0
+
+
+class SaveStatus:
+    """Résultat d'un envoi, lu par le rerun suivant de chaque session concernée."""
+
+    def __init__(self, state: str, message: str = "", edits: int = 0, revision: Optional[int] = None,
+                 committed: Optional[ChangeSet] = None, merged: bool = False):
+        self.state = state          # "ok", "error" ou "size_limit"
+        self.message = message
+        self.edits = edits          # nombre de sauvegardes regroupées dans l'envoi
+        self.revision = revision    # révision du backend après l'envoi
+        self.committed = committed  # lot à intégrer à la DB partagée (modifications concurrentes comprises)
+        self.merged = merged        # écriture concurrente fusionnée avant l'envoi
+        self.at = time.time()
+
+
+class WriteBehindQueue:
+    """Un thread d'écriture par backend. `submit` rend la main immédiatement ; l'envoi part après
+    `debounce` secondes sans nouvelle modification (au plus `max_delay` après la première).
+
+    Avec `base` (DB partagée courante), le document envoyé est `base()` + le lot fusionné, et
+    `on_committed(lot, révision)` est appelé après chaque envoi réussi ; sans `base`, c'est le dernier état soumis.
+    Si le backend a changé depuis `base()` (ConflictError), le lot est fusionné à trois voies avec la
+    dernière version puis renvoyé une fois. Un envoi en échec est remis en file et relancé après
+    `RETRY_SECONDS` (doublé à chaque échec consécutif, au plus `RETRY_MAX_SECONDS`).
+    """
+
+    def __init__(self, backend: StorageBackend, debounce: float = DEBOUNCE_SECONDS,
+                 max_delay: float = MAX_DELAY_SECONDS, on_upload: Optional[Callable[[float], None]] = None,
+                 base: Optional[Callable[[], Dict[str, Any]]] = None,
+                 on_committed: Optional[Callable[[ChangeSet], None]] = None):
+        self.backend = backend
+        self.on_upload = on_upload      # reçoit la durée de chaque envoi (ms)
+        self.base = base
+        self.on_committed = on_committed
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._db: Optional[Dict[str, Any]] = None   # instantané complet (sauvegarde complète, ou sans `base`)
+        self._changes = ChangeSet()
+        self._full = False                          # sauvegarde complète demandée (sans lot)
+        self._origins: Dict[str, int] = {}          # session -> nombre de sauvegardes en attente
+        self._sending: Dict[str, int] = {}          # idem pour l'envoi en cours
+        self._first = self._deadline = None
+        self._in_flight = False
+        self._failures = 0                          # échecs consécutifs (lot en attente de relance)
+        self._statuses: Dict[str, SaveStatus] = {}
+        self.uploads = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="save-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Côté sessions ---
+    def submit(self, db: Dict[str, Any], changes: Optional[ChangeSet] = None, origin: str = "") -> None:
+        """Met en file le lot `changes` (sauvegarde complète de `db` si None)."""
+        snapshot = snapshot_db(db) if changes is None or self.base is None else None
+        with self._cond:
+            self._dirty = True
+            if snapshot is not None: self._db = snapshot
+            if changes is None: self._full = True
+            else: self._changes.merge(changes.snapshot())
+            self._origins[origin] = self._origins.get(origin, 0) + 1
+            now = time.monotonic()
+            if self._first is None: self._first = now
+            self._deadline = min(now + self.debounce, self._first + self.max_delay)
+            self._cond.notify()
+
+    def pending(self, origin: Optional[str] = None) -> bool:
+        """Sauvegardes de `origin` pas encore validées (relances comprises). Sans `origin` : envoi en cours ou
+        imminent ; un lot qui attend sa relance après un échec n'en fait pas partie (il sera fusionné avec
+        la DB relue, cf. `base`)."""
+        with self._cond:
+            if origin is None: return self._in_flight or (self._dirty and not self._failures)
+            return origin in self._origins or origin in self._sending
+
+    def pop_status(self, origin: str) -> Optional[SaveStatus]:
+        """Dernier résultat d'envoi pour `origin` (une seule fois)."""
+        with self._cond:
+            return self._statuses.pop(origin, None)
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Envoie immédiatement ce qui est en attente et attend la fin ; False si échec ou délai dépassé."""
+        end = time.monotonic() + timeout
+        with self._cond:
+            if self._dirty: self._deadline = time.monotonic()
+            self._cond.notify_all()
+            # Un lot qui échoue pendant le vidage est relancé plus tard : on ne l'attend pas
+            failures = self._failures
+            while self._in_flight or (self._dirty and self._failures == failures):
+                remaining = end - time.monotonic()
+                if remaining <= 0: return False
+                self._cond.wait(remaining)
+            return not self._dirty
+
+    def close(self) -> None:
+        """Vidage à l'arrêt du processus."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # --- Thread d'écriture ---
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (self._deadline is None or time.monotonic() < self._deadline):
+                    self._cond.wait(None if self._deadline is None else self._deadline - time.monotonic())
+                if self._closed: return
+                db, changes, full, origins = self._db, self._changes, self._full, self._origins
+                self._db, self._changes, self._full, self._origins = None, ChangeSet(), False, {}
+                self._dirty = False
+                self._first = self._deadline = None
+                self._in_flight, self._sending = True, origins
+            start = time.perf_counter()
+            status = self._upload(db, changes, full, sum(origins.values()))
+            if self.on_upload: self.on_upload(1000 * (time.perf_counter() - start))
+            if status.state == "ok" and self.on_committed and status.committed:
+                self.on_committed(status.committed, None if full else status.revision)
+            with self._cond:
+                self._in_flight, self._sending = False, {}
+                self.uploads += 1
+                if status.state == "error":
+                    # Le lot reste en attente, relancé après un délai croissant (ou avec le prochain envoi)
+                    self._dirty = True
+                    if self._db is None: self._db = db
+                    self._changes = changes.merge(self._changes)
+                    self._full = self._full or full
+                    self._failures += 1
+                    if self._deadline is None:
+                        self._deadline = time.monotonic() + min(RETRY_MAX_SECONDS, RETRY_SECONDS * 2 ** (self._failures - 1))
+                else:
+                    self._failures = 0
+                for origin, count in origins.items():
+                    self._statuses[origin] = status
+                    if status.state == "error": self._origins[origin] = self._origins.get(origin, 0) + count
+                self._cond.notify_all()
+
+    def _latest(self, base: Dict[str, Any], conflict: ConflictError):
+        """(révision, lot) des modifications écrites ailleurs depuis `base` : flux, sinon (flux absent, incomplet
+        ou en retard sur la révision vue par le contrôle) DB complète relue."""
+        head, theirs = self.backend.changes_since(doc_revision(base))
+        if theirs is None or head is None or head < conflict.head:
+            latest = self.backend.load()
+            head, theirs = doc_revision(latest), diff_db(base, latest)
+        return head, theirs
+
+    def _upload(self, db, changes: ChangeSet, full: bool, edits: int) -> SaveStatus:
+        try:
+            if full or self.base is None: base = db
+            else: base = self.base()
+            committed, merged = changes, False
+            # Nouveau dictionnaire racine : le backend y tamponne la révision écrite
+            doc = dict(apply_changes(base, changes)) if self.base is not None else dict(db)
+            try:
+                ok = self.backend.save(doc) if full else self.backend.commit(doc, changes)
+            except ConflictError as conflict:
+                if self.base is None: raise
+                head, theirs = self._latest(base, conflict)
+                changes = rebase(changes, base, theirs)
+                doc = {**apply_changes(apply_changes(base, theirs), changes), "revision": head}
+                ok = self.backend.commit(doc, changes)      # second conflit : échec, lot gardé en attente
+                committed, merged = theirs.merge(changes), True
+            return SaveStatus("ok" if ok else "error", "" if ok else "Le serveur a refusé la sauvegarde.", edits,
+                              doc.get("revision"), committed, merged)
+        except StorageSizeLimitError:
+            return SaveStatus("size_limit", "Limite taille JSON atteinte.", edits)
+        except Exception as e:
+            return SaveStatus("error", str(e), edits)
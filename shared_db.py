@@ -0,0 +1,145 @@
+# shared_db.py
+"""DB partagée par toutes les sessions du processus + surcouche privée (copie à l'écriture) par session."""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fleet_repo import FleetRepository
+from storage import ChangeSet, apply_changes, doc_revision
+
+# (révision connue) -> (révision du backend, lot depuis la révision connue), cf. StorageBackend.changes_since
+Feed = Callable[[int], Tuple[Optional[int], Optional[ChangeSet]]]
+
+
+class SharedDB:
+    """Instantané en lecture seule : jamais modifié en place, remplacé à chaque lot validé (`revision` + 1).
+    Les index de flotte (et le DataFrame) sont partagés par les sessions ; construits au chargement, puis
+    dérivés du précédent à chaque lot (seules les lignes du lot sont ré-indexées).
+
+    `revision` compte les instantanés du processus ; `db["revision"]` est la révision du backend,
+    suivie via `feed` (relevé au plus une fois par `poll_interval` s pour tout le processus)."""
+
+    def __init__(self, loader: Callable[[], Dict[str, Any]], max_age: float = 300,
+                 feed: Optional[Feed] = None, poll_interval: float = 3,
+                 shard_loader: Optional[Callable[[str], Optional[List[dict]]]] = None):
+        self.loader = loader
+        self.max_age = max_age
+        self.feed = feed
+        self.poll_interval = poll_interval
+        self.shard_loader = shard_loader    # lignes d'un seul propriétaire (backend découpé par pilote)
+        self.polled_at = 0.0
+        self.live = False                   # le backend a répondu avec un flux
+        self.patches = 0
+        self._owner_polls: Dict[str, float] = {}
+        self.db: Optional[Dict[str, Any]] = None
+        self.revision = 0
+        self.loaded_at = 0.0
+        self._repo: Optional[FleetRepository] = None
+        self._repo_revision = -1
+        self._lock = threading.RLock()
+        self._poll_lock = threading.Lock()
+
+    def get(self) -> Dict[str, Any]:
+        with self._lock:
+            if self.db is None: self.reload()
+            return self.db
+
+    def reload(self) -> None:
+        db = self.loader()
+        with self._lock:
+            self.db = db
+            self.revision += 1
+            self.loaded_at = time.monotonic()
+
+    def stale(self) -> bool:
+        return self.db is None or time.monotonic() - self.loaded_at > self.max_age
+
+    def apply(self, changes: ChangeSet, store_revision: Optional[int] = None) -> None:
+        """Intègre un lot sauvegardé : nouveau document (lignes inchangées partagées), nouvelle révision."""
+        with self._lock:
+            db = apply_changes(self.get(), changes)
+            if store_revision is not None and store_revision > doc_revision(db):
+                db = {**db, "revision": store_revision}
+            if self._repo is not None and self._repo_revision == self.revision:
+                self._repo = self._repo.derive(changes, db.get("fleet"))
+                self._repo_revision = self.revision + 1
+            self.db = db
+            self.revision += 1
+
+    def sync(self) -> Optional[bool]:
+        """Relève le flux du backend et applique les lignes modifiées ailleurs (rechargement complet si le
+        flux ne couvre plus l'écart). True si la DB a changé ; None sans flux ou si le flux n'est pas fiable
+        (repli sur le rechargement après `max_age`) : flux illisible, en retard sur le document, ou sans
+        nouveauté depuis `max_age` (une tête de flux non publiée ne se distingue pas d'un flux calme)."""
+        if self.feed is None: return None
+        if self.db is None or time.monotonic() - self.polled_at < self.poll_interval: return False
+        # Un seul relevé à la fois pour le processus : les autres sessions gardent l'instantané courant
+        if not self._poll_lock.acquire(blocking=False): return False
+        try:
+            self.polled_at = time.monotonic()
+            known = doc_revision(self.db)
+            try:
+                head, changes = self.feed(known)
+            except Exception:
+                return None
+            self.live = head is not None
+            if head is None or head < known: return None
+            if head == known: return None if self.stale() else False
+            if changes is None:
+                self.reload()
+            else:
+                with self._lock:
+                    if doc_revision(self.db) != known: return True     # intégré entre-temps
+                    self.apply(changes, head)
+                    self.patches += 1
+            return True
+        finally:
+            self._poll_lock.release()
+
+    def refresh_owner(self, owner: str) -> bool:
+        """Relit le seul bin de `owner` et remplace ses lignes (au plus une fois par `poll_interval` et par
+        propriétaire) ; sans objet si le flux tient déjà la DB à jour. True si la DB a changé."""
+        if self.shard_loader is None or self.live or self.db is None: return False
+        now = time.monotonic()
+        if now - self._owner_polls.get(owner, 0.0) < self.poll_interval: return False
+        self._owner_polls[owner] = now
+        revision = self.revision
+        rows = self.shard_loader(owner)
+        if rows is None: return False
+        with self._lock:
+            if self.revision != revision: return False     # lot intégré entre-temps : lecture peut-être périmée
+            current = {row["id"]: row for row in self.repo().rows_for_owner(owner)}
+            changes = ChangeSet()
+            for row in rows:
+                if current.pop(row["id"], None) != row: changes.upsert_ship(row)
+            for ship_id in current: changes.delete_ship(ship_id)
+            if not changes: return False
+            self.apply(changes)
+            return True
+
+    def repo(self) -> FleetRepository:
+        """Index de la révision courante (reconstruits après un rechargement) ; à utiliser en lecture seule."""
+        with self._lock:
+            if self._repo_revision != self.revision:
+                self._repo = FleetRepository(self.get()["fleet"])
+                self._repo_revision = self.revision
+            return self._repo
+
+
+class SessionOverlay:
+    """Vue privée d'une session qui modifie la DB : pilotes copiés, index dérivés de ceux du `SharedDB`
+    (seules les clés modifiées par la session sont copiées). Abandonnée dès que ses sauvegardes sont
+    validées dans le `SharedDB`."""
+
+    def __init__(self, shared: SharedDB):
+        with shared._lock:
+            base = shared.get()
+            self.repo = shared.repo().fork()
+            self.base_revision = shared.revision
+        self._db = {**base, "users": dict(base.get("users", {})), "user_data": dict(base.get("user_data", {}))}
+
+    @property
+    def db(self) -> Dict[str, Any]:
+        """Document de la session ; `fleet` suit les modifications faites via `repo`."""
+        self._db["fleet"] = self.repo.rows
+        return self._db
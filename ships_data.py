@@ -1,6 +1,12 @@
 # ships_data.py
+import hashlib
 import json
-from typing import Dict, Any
+import os
+import pickle
+from typing import Dict, Any, Optional
+
+import name_matcher
+from name_matcher import NameMatcher
 
 # --- 1. BASE DE CONNAISSANCE UNIFIÉE (Prix, Rôle, Image locale) ---
 # Statut 'ingame' forcé à True pour l'affichage aUEC de tous les vaisseaux.
@@ -251,27 +257,6 @@ BASE_CATALOG_DATA = {
 
 # --- 2. FONCTIONS DE FUSION ET DE NETTOYAGE DES DONNÉES ---
 
-def clean_name(name: str) -> str:
-    """Nettoie et normalise le nom du vaisseau pour la clé de fusion (match scrap.json)."""
-    name = name.lower()
-    replacements = {
-        "best in show edition 2949": "", "expedition w/c8x": "w c8x", "expedition": "", 
-        "pirate edition": "", "utility": "", "emerald": "", "solstice": "", 
-        "vindicator": "", "firebird": "", "peregrine": "", "raven": "", 
-        "comet": "", "talus": "", "carbon": "", "force": "", "velocity": "",
-        "lx": "", "mx": "", "aa": "", "mt": "", "rc": "", "rn": "", "tr": "", 
-        "ds": "", "cl": "", "es": "", "mr": "", "ln": "", "g12r": "g12", 
-        "g12a": "g12", "kue": "", "l-21 wolf": "l 21 wolf", 
-        "p-52 merlin": "p 52 merlin", "p-72 archimedes": "p 72 archimedes",
-        "atls geo": "atls", "honrnet": "hornet", "femini": "gemini"
-    }
-    for old, new in replacements.items():
-        name = name.replace(old, new)
-        
-    name = name.replace("-", " ").replace(".", " ").strip()
-    return " ".join(name.split())
-
-
 def load_and_merge_ships_data(catalog_data: Dict[str, Any], json_path: str = "scrap.json") -> Dict[str, Any]:
     """
     Charge les données de scrap.json et les fusionne avec la base de données du catalogue.
@@ -289,12 +274,11 @@ def load_and_merge_ships_data(catalog_data: Dict[str, Any], json_path: str = "sc
         print(f"❌ Erreur de décodage JSON dans {json_path}. Vérifiez la syntaxe du fichier.")
         return catalog_data
     
-    # 2. Convertir le JSON en dictionnaire de spécifications
+    # 2. Convertir le JSON en dictionnaire de spécifications (clé : titre scrap)
     scrap_db = {}
     for entry in scrap_data_list:
         try:
             raw_title = entry["ship"]["title"]["title"]
-            normalized_key = clean_name(raw_title)
             
             specs = entry["ship"]["specification"]
             
@@ -313,25 +297,24 @@ def load_and_merge_ships_data(catalog_data: Dict[str, Any], json_path: str = "sc
                 except ValueError:
                     pass
 
-            scrap_db[normalized_key] = specs_clean
+            scrap_db[raw_title] = specs_clean
             
         except KeyError:
             continue
 
-    # 3. Fusionner les données et appliquer les règles d'affichage
+    # 3. Rapprocher les noms du catalogue des titres scrap (index par ensemble de tokens)
+    report = NameMatcher(scrap_db).match_all(catalog_data)
+
+    # 4. Fusionner les données et appliquer les règles d'affichage
     final_ships_db = {}
-    match_count = 0
     
     for name, data in catalog_data.items():
         final_data = data.copy()
         
-        # Tenter la fusion avec les données de scrap.json
-        normalized_key = clean_name(name)
-        specs = scrap_db.get(normalized_key)
-        
-        if specs:
-            final_data.update(specs)
-            match_count += 1
+        # Fusion avec les données de scrap.json
+        match = report.matched.get(name)
+        if match:
+            final_data.update(scrap_db[match[0]])
             
         # --- RÈGLE D'AFFICHAGE DU PRIX aUEC : 0 devient la chaîne descriptive ---
         if final_data.get("auec_price") == 0:
@@ -342,11 +325,74 @@ def load_and_merge_ships_data(catalog_data: Dict[str, Any], json_path: str = "sc
     # Log pour information
     print(f"\n--- Fusion & Nettoyage de Données ---")
     print(f"Statut 'ingame' forcé à True pour l'affichage aUEC.")
-    print(f"Spécifications fusionnées : {match_count} entrées")
+    for line in report.lines():
+        print(line)
     print(f"Prix aUEC à 0 remplacés par 'Non achetable en jeu'.")
     print("---")
     
     return final_ships_db
 
-# --- 3. EXÉCUTION DE LA FUSION ET EXPORTATION DE LA CONSTANTE FINALE ---
-SHIPS_DB = load_and_merge_ships_data(BASE_CATALOG_DATA, "scrap.json")
\ No newline at end of file
+# --- 3. ARTEFACT COMPILÉ (évite la fusion à chaque démarrage) ---
+_HERE = os.path.dirname(os.path.abspath(__file__))
+SCRAP_PATH = os.path.join(_HERE, "scrap.json")
+ARTIFACT_PATH = os.path.join(_HERE, "ships_catalog.pkl")
+ARTIFACT_FORMAT = 1
+
+
+def catalog_source_hash(json_path: str = SCRAP_PATH) -> str:
+    """Empreinte des sources de la fusion : ce module (BASE_CATALOG_DATA, règles), le rapprochement de noms + scrap.json."""
+    h = hashlib.sha256()
+    for path in (os.path.abspath(__file__), os.path.abspath(name_matcher.__file__), json_path):
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"<absent>")
+    return h.hexdigest()
+
+
+def compile_catalog(artifact_path: str = ARTIFACT_PATH, json_path: str = SCRAP_PATH) -> Dict[str, Any]:
+    """Fusionne le catalogue et écrit l'artefact versionné ; renvoie son contenu."""
+    ships_db = load_and_merge_ships_data(BASE_CATALOG_DATA, json_path)
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "source_hash": catalog_source_hash(json_path),
+        # Empreinte du catalogue fusionné : clé des index et caches dérivés
+        "catalog_version": hashlib.sha1(json.dumps(ships_db, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12],
+        "ships_db": ships_db,
+    }
+    tmp = f"{artifact_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, artifact_path)
+    except OSError as e:
+        print(f"⚠️ Artefact catalogue non écrit ({e}).")
+    return artifact
+
+
+def load_catalog_artifact(artifact_path: str = ARTIFACT_PATH, json_path: str = SCRAP_PATH) -> Optional[Dict[str, Any]]:
+    """Artefact compilé s'il existe et correspond aux sources actuelles, sinon None."""
+    try:
+        with open(artifact_path, "rb") as f:
+            artifact = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if artifact.get("format") != ARTIFACT_FORMAT or artifact.get("source_hash") != catalog_source_hash(json_path):
+        return None
+    return artifact
+
+
+def __getattr__(name: str):
+    """SHIPS_DB / CATALOG_VERSION chargés au premier accès : artefact si à jour, sinon fusion complète."""
+    if name not in ("SHIPS_DB", "CATALOG_VERSION"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    artifact = load_catalog_artifact() or compile_catalog()
+    globals().update(SHIPS_DB=artifact["ships_db"], CATALOG_VERSION=artifact["catalog_version"])
+    return globals()[name]
+
+
+if __name__ == "__main__":
+    # Étape de build : python ships_data.py
+    built = compile_catalog()
+    print(f"Artefact {ARTIFACT_PATH} : {len(built['ships_db'])} vaisseaux, version {built['catalog_version']}.")
\ No newline at end of file
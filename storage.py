@@ -0,0 +1,683 @@
+# storage.py
+"""Backends de persistance de la DB (JSONBin.io ou SQLite local)."""
+import gzip
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from compact import decode_changes, decode_db, encode_changes, encode_db
+
+DEFAULT_META = {"admin_code": "9999", "corpo_code": "APQ8M3"}
+
+
+def empty_db() -> Dict[str, Any]:
+    """DB vide utilisée en mode hors ligne ou en cas d'erreur."""
+    return {"users": {}, "fleet": [], **DEFAULT_META}
+
+
+class StorageError(Exception):
+    """Le backend n'a pas pu lire ou écrire la DB."""
+
+
+class StorageSizeLimitError(StorageError):
+    """Le backend refuse le document car il dépasse sa taille maximale."""
+
+
+class ConflictError(StorageError):
+    """Le lot a été construit sur une révision plus ancienne que celle du backend (écriture concurrente)."""
+
+    def __init__(self, base: int, head: int):
+        super().__init__(f"La DB a changé pendant la sauvegarde (révision {base}, serveur {head}).")
+        self.base = base
+        self.head = head
+
+
+# --- 1. LOT DE MODIFICATIONS ---
+
+class ChangeSet:
+    """Modifications ligne à ligne à répercuter sur le stockage."""
+
+    def __init__(self):
+        self.upserts: Dict[int, dict] = {}      # id -> ligne de flotte complète
+        self.deletes: set = set()               # ids de flotte supprimés
+        self.users: Dict[str, Optional[str]] = {}       # pilote -> PIN (None = suppression)
+        self.user_data: Dict[str, Optional[dict]] = {}  # pilote -> données (None = suppression)
+        self.meta: Dict[str, Any] = {}          # admin_code, corpo_code...
+
+    def upsert_ship(self, row: dict) -> "ChangeSet":
+        self.deletes.discard(row["id"])
+        self.upserts[row["id"]] = row
+        return self
+
+    def delete_ship(self, ship_id: int) -> "ChangeSet":
+        self.upserts.pop(ship_id, None)
+        self.deletes.add(ship_id)
+        return self
+
+    def set_user(self, pilot: str, pin: str) -> "ChangeSet":
+        self.users[pilot] = pin
+        return self
+
+    def delete_user(self, pilot: str) -> "ChangeSet":
+        self.users[pilot] = None
+        self.user_data[pilot] = None
+        return self
+
+    def set_user_data(self, pilot: str, data: dict) -> "ChangeSet":
+        self.user_data[pilot] = data
+        return self
+
+    def set_meta(self, key: str, value: Any) -> "ChangeSet":
+        self.meta[key] = value
+        return self
+
+    def merge(self, other: "ChangeSet") -> "ChangeSet":
+        """Ajoute `other` (plus récent) à ce lot : la dernière écriture de chaque clé l'emporte."""
+        for ship_id in other.deletes: self.delete_ship(ship_id)
+        for row in other.upserts.values(): self.upsert_ship(row)
+        self.users.update(other.users)
+        self.user_data.update(other.user_data)
+        self.meta.update(other.meta)
+        return self
+
+    def snapshot(self) -> "ChangeSet":
+        """Copie indépendante des lignes (sûre à sérialiser depuis un autre thread)."""
+        copy = ChangeSet()
+        copy.upserts = {i: copy_row(r) for i, r in self.upserts.items()}
+        copy.deletes = set(self.deletes)
+        copy.users = dict(self.users)
+        copy.user_data = {p: dict(d) if d is not None else None for p, d in self.user_data.items()}
+        copy.meta = dict(self.meta)
+        return copy
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forme JSON (entrée du flux de modifications)."""
+        return {"upserts": list(self.upserts.values()), "deletes": sorted(self.deletes),
+                "users": self.users, "user_data": self.user_data, "meta": self.meta}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChangeSet":
+        changes = cls()
+        for ship_id in data.get("deletes", []): changes.delete_ship(ship_id)
+        for row in data.get("upserts", []): changes.upsert_ship(row)
+        changes.users.update(data.get("users", {}))
+        changes.user_data.update(data.get("user_data", {}))
+        changes.meta.update(data.get("meta", {}))
+        return changes
+
+    def __bool__(self):
+        return bool(self.upserts or self.deletes or self.users or self.user_data or self.meta)
+
+
+_ID_RANDOM = random.SystemRandom()
+ID_BITS = 53        # entiers exacts en JSON / JavaScript
+
+
+def new_ship_ids(n: int, taken=()) -> List[int]:
+    """`n` ids de flotte tirés au hasard sur 53 bits, hors `taken` : sans collision pratique entre
+    processus (contrairement à un horodatage + rang)."""
+    ids: List[int] = []
+    seen = set()
+    while len(ids) < n:
+        ship_id = _ID_RANDOM.getrandbits(ID_BITS)
+        if ship_id and ship_id not in seen and ship_id not in taken:
+            seen.add(ship_id)
+            ids.append(ship_id)
+    return ids
+
+
+def copy_row(row: dict) -> dict:
+    """Copie d'une ligne de flotte (CrewList comprise)."""
+    copy = dict(row)
+    if "CrewList" in copy: copy["CrewList"] = list(copy["CrewList"])
+    return copy
+
+
+def apply_changes(db: Dict[str, Any], changes: ChangeSet) -> Dict[str, Any]:
+    """Nouveau document = `db` + `changes`, sans modifier `db` (les lignes inchangées sont partagées)."""
+    if not changes: return db
+    out = dict(db)
+    out.update(changes.meta)
+    if changes.upserts or changes.deletes:
+        known = set()
+        fleet = []
+        for row in db.get("fleet", []):
+            sid = row["id"]
+            known.add(sid)
+            if sid in changes.deletes: continue
+            fleet.append(changes.upserts.get(sid, row))
+        fleet.extend(row for sid, row in changes.upserts.items() if sid not in known)
+        out["fleet"] = fleet
+    for key, updates in (("users", changes.users), ("user_data", changes.user_data)):
+        if updates:
+            merged = dict(db.get(key, {}))
+            for pilot, value in updates.items():
+                if value is None: merged.pop(pilot, None)
+                else: merged[pilot] = value
+            out[key] = merged
+    return out
+
+
+# Flux de modifications : entrées conservées par le backend (au-delà, rechargement complet)
+FEED_LENGTH = 200
+# Taille max du journal JSONBin (sous la limite d'un bin du plan gratuit, 100 Ko)
+FEED_MAX_BYTES = 64 * 1024
+
+
+def trim_feed(entries: List[dict], max_bytes: int = FEED_MAX_BYTES) -> List[dict]:
+    """Dernières entrées du journal tenant en `FEED_LENGTH` entrées et `max_bytes` octets ; une entrée
+    trop grosse à elle seule devient une sauvegarde complète (les lecteurs rechargeront la DB)."""
+    kept, size = [], 0
+    for entry in reversed(entries[-FEED_LENGTH:]):
+        n = len(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+        if n > max_bytes and not kept:
+            entry = {"revision": entry["revision"], "changes": None}
+            n = len(json.dumps(entry))
+        if size + n > max_bytes: break
+        kept.append(entry)
+        size += n
+    return kept[::-1]
+
+
+def merge_feed(revision: int, entries: Iterable[Tuple[int, Optional[dict]]], head: int) -> Optional[ChangeSet]:
+    """Lot cumulé des entrées (révision, lot sérialisé ou None pour une sauvegarde complète) de `revision`
+    (exclue) à `head`. None si la suite n'est pas contiguë, s'arrête avant `head` (lot non journalisé) ou
+    contient une sauvegarde complète."""
+    merged, expected = ChangeSet(), revision + 1
+    for rev, data in sorted(entries, key=lambda e: e[0]):
+        if rev <= revision: continue
+        if rev > head: break
+        if rev != expected or data is None: return None
+        merged.merge(ChangeSet.from_dict(data))
+        expected += 1
+    return merged if expected == head + 1 else None
+
+
+def doc_revision(db: Dict[str, Any]) -> int:
+    return int(db.get("revision", 0) or 0)
+
+
+def snapshot_db(db: Dict[str, Any]) -> Dict[str, Any]:
+    """Copie de la DB à deux niveaux : les mutations ultérieures de la session ne la touchent pas."""
+    copy = {k: (dict(v) if isinstance(v, dict) else v) for k, v in db.items()}
+    copy["fleet"] = [copy_row(r) for r in db.get("fleet", [])]
+    if "user_data" in db: copy["user_data"] = {p: dict(d) for p, d in db["user_data"].items()}
+    return copy
+
+
+# --- 2. INTERFACE ---
+
+class StorageBackend:
+    """Interface commune : chargement complet, sauvegarde complète, écritures ligne à ligne."""
+    name = "base"
+
+    def load(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def save(self, db: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def commit(self, db: Dict[str, Any], changes: ChangeSet) -> bool:
+        """Répercute `changes` (déjà appliqués à `db`). Par défaut : sauvegarde complète.
+        `db["revision"]` est la révision de base du lot : ConflictError si le backend est plus récent."""
+        return self.save(db)
+
+    def changes_since(self, revision: int) -> Tuple[Optional[int], Optional[ChangeSet]]:
+        """(révision courante, lot des modifications depuis `revision`) en un appel léger.
+        (None, None) si le backend n'a pas de flux ; lot None si un rechargement complet est nécessaire.
+        `save` / `commit` tamponnent la nouvelle révision dans `db["revision"]`."""
+        return None, None
+
+
+# --- 3. JSONBIN.IO (document unique) ---
+
+JSONBIN_URL = "https://api.jsonbin.io/v3"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class JsonBinClient:
+    """Session HTTP partagée : connexions keep-alive en pool, gzip, relances bornées avec backoff
+    aléatoire sur 429/5xx et erreurs réseau, latence de chaque appel conservée pour les métriques."""
+
+    def __init__(self, master_key: str, base_url: str = JSONBIN_URL, timeout: float = 10,
+                 retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0,
+                 pool_size: int = 4, gzip_requests: bool = False, gzip_min_bytes: int = 1024,
+                 session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.gzip_requests = gzip_requests
+        self.gzip_min_bytes = gzip_min_bytes
+        self.calls = deque(maxlen=500)      # (méthode, chemin, statut, secondes, tentatives, octets envoyés)
+        self._lock = threading.Lock()
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        session.headers.update({"X-Master-Key": master_key, "Accept-Encoding": "gzip"})
+        self.session = session
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def request(self, method: str, path: str, payload: Any = None) -> requests.Response:
+        """Appel avec relances ; renvoie la dernière réponse ou lève la dernière erreur réseau."""
+        headers, body = {}, None
+        if payload is not None:
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+            if self.gzip_requests and len(body) >= self.gzip_min_bytes:
+                body = gzip.compress(body, compresslevel=5)
+                headers["Content-Encoding"] = "gzip"
+        start = time.perf_counter()
+        attempt, response = 0, None
+        while True:
+            try:
+                response = self.session.request(method, self.base_url + path, data=body, headers=headers, timeout=self.timeout)
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            if attempt >= self.retries or (error is None and response.status_code not in RETRY_STATUSES):
+                break
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+        with self._lock:
+            self.calls.append((method, path, response.status_code if response is not None else None,
+                               time.perf_counter() - start, attempt + 1, len(body or b"")))
+        if error is not None: raise error
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Nombre d'appels, relances, erreurs et latences (moyenne, max) par méthode."""
+        with self._lock:
+            calls = list(self.calls)
+        out = {}
+        for method in sorted({c[0] for c in calls}):
+            mine = [c for c in calls if c[0] == method]
+            seconds = [c[3] for c in mine]
+            out[method] = {"calls": len(mine), "retries": sum(c[4] - 1 for c in mine),
+                           "errors": sum(1 for c in mine if c[2] is None or c[2] >= 400),
+                           "avg_ms": 1000 * sum(seconds) / len(seconds), "max_ms": 1000 * max(seconds)}
+        return out
+
+
+class JsonBinBackend(StorageBackend):
+    """Document unique. Un bin de quelques octets (`feed_bin_id`) porte la révision courante (tête du flux)
+    et l'id d'un bin journal des derniers lots (`trim_feed`, lignes en colonnes hors encodage "json") :
+    les autres processus relèvent la tête, puis le journal seulement si elle a avancé. Sans `feed_bin_id`,
+    celui noté dans le document (clé `feed`) est repris, sinon la tête est créée à la première écriture.
+    `encoding` : "json", "compact" (colonnes, cf. compact.py) ou "packed" ; en "compact", un document
+    refusé pour sa taille est renvoyé une fois compressé."""
+    name = "jsonbin"
+
+    def __init__(self, bin_id: str, master_key: str, timeout: float = 10, client: Optional[JsonBinClient] = None,
+                 feed_bin_id: Optional[str] = None, encoding: str = "json"):
+        self.bin_id = bin_id
+        self.feed_bin_id = feed_bin_id
+        self.encoding = encoding
+        self.client = client or JsonBinClient(master_key, timeout=timeout)
+
+    def _get(self, bin_id: str) -> Optional[Dict[str, Any]]:
+        """Contenu d'un bin ; None s'il n'existe pas."""
+        response = self.client.request("GET", f"/b/{bin_id}/latest")
+        if response.status_code == 404: return None
+        if response.status_code != 200:
+            raise StorageError(f"JSONBin {response.status_code} : {response.text[:200]}")
+        return response.json().get("record", {})
+
+    def _send(self, method: str, path: str, db: Dict[str, Any]) -> requests.Response:
+        """Écrit `db` dans l'encodage configuré (repli compressé sur 403 en "compact")."""
+        response = self.client.request(method, path, encode_db(db, self.encoding))
+        if response.status_code == 403 and self.encoding == "compact":
+            response = self.client.request(method, path, encode_db(db, "packed"))
+        if response.status_code == 403: raise StorageSizeLimitError(response.text)
+        return response
+
+    def load(self) -> Dict[str, Any]:
+        record = self._get(self.bin_id)
+        if record is None: raise StorageError(f"JSONBin 404 : bin {self.bin_id} introuvable")
+        self._locate_feed(record)
+        try:
+            return decode_db(record)
+        except (ValueError, KeyError) as e:
+            raise StorageError(f"Document JSONBin illisible : {e}") from e
+
+    def save(self, db: Dict[str, Any]) -> bool:
+        return self._write(db, None)
+
+    def commit(self, db: Dict[str, Any], changes: ChangeSet) -> bool:
+        return self._write(db, changes)
+
+    def _locate_feed(self, record: Dict[str, Any]) -> None:
+        """Reprend la tête du flux notée dans le document (ou le manifeste) si aucune n'est configurée."""
+        if not self.feed_bin_id and record.get("feed"): self.feed_bin_id = record["feed"]
+
+    def _read_feed(self) -> Optional[Dict[str, Any]]:
+        """Tête du flux ({"revision", "log"}) ; None sans flux configuré."""
+        if not self.feed_bin_id: return None
+        return self._get(self.feed_bin_id) or {"revision": 0}
+
+    def _open_feed(self, current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Tête du flux pour une écriture sans flux connu : celle notée dans `current` (document relu), sinon
+        un nouveau bin à la révision du document, noté dans le document écrit ensuite. None si la création
+        échoue : l'écriture passe, les autres processus restent sur le rechargement périodique."""
+        self._locate_feed(current)
+        if self.feed_bin_id: return self._read_feed()
+        head = {"revision": doc_revision(current), "log": None}
+        try:
+            response = self.client.request("POST", "/b", head)
+            self.feed_bin_id = response.json().get("metadata", {}).get("id") if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            pass
+        return head if self.feed_bin_id else None
+
+    def _read_log(self, feed: Dict[str, Any]) -> List[dict]:
+        if "entries" in feed: return feed["entries"]       # ancien flux : journal dans la tête
+        log = self._get(feed["log"]) if feed.get("log") else None
+        return (log or {}).get("entries", [])
+
+    def _publish(self, feed: Optional[Dict[str, Any]], revision: int, changes: Optional[ChangeSet]) -> None:
+        """Ajoute le lot écrit au journal puis avance la tête. Un journal non écrit laisse un trou (les lecteurs
+        rechargeront la DB) ; une tête non écrite reste en retard sur le document : le contrôle de conflit des
+        écritures suivantes la prend pour base (cf. `_write`), les lecteurs retombent sur le rechargement
+        périodique (`SharedDB.sync`)."""
+        if feed is None: return
+        data = changes.to_dict() if changes is not None else None
+        entry = {"revision": revision, "changes": encode_changes(data) if self.encoding != "json" else data}
+        log_id = feed.get("log")
+        try:
+            entries = {"entries": trim_feed(self._read_log(feed) + [entry])}
+            response = self.client.request("PUT", f"/b/{log_id}", entries) if log_id else None
+            if response is None or response.status_code == 404:
+                # Premier lot (ou journal supprimé) : nouveau bin journal
+                response = self.client.request("POST", "/b", entries)
+                log_id = response.json().get("metadata", {}).get("id") if response.status_code == 200 else None
+        except (StorageError, requests.RequestException, ValueError):
+            pass        # journal inchangé : trou à la révision `revision`
+        try:
+            self.client.request("PUT", f"/b/{self.feed_bin_id}", {"revision": revision, "log": log_id})
+        except requests.RequestException:
+            pass
+
+    def _write(self, db: Dict[str, Any], changes: Optional[ChangeSet]) -> bool:
+        """Contrôle de conflit au mieux : révision lue dans la tête du flux (quelques octets ; le document
+        seulement sans flux), puis écriture sans condition (JSONBin n'a pas d'écriture conditionnelle). Deux
+        écritures simultanées, ou une tête restée en retard après une publication échouée, passent le contrôle :
+        la dernière écriture l'emporte."""
+        feed = self._read_feed()
+        if feed is not None: head = int(feed.get("revision", 0))
+        else:
+            current = self._get(self.bin_id) or {}
+            feed = self._open_feed(current)
+            head = max(doc_revision(current), int(feed["revision"]) if feed else 0)
+        if changes is not None and head > doc_revision(db): raise ConflictError(doc_revision(db), head)
+        db["revision"] = max(doc_revision(db), head) + 1
+        if self.feed_bin_id: db["feed"] = self.feed_bin_id
+        if self._send("PUT", f"/b/{self.bin_id}", db).status_code not in (200, 204): return False
+        self._publish(feed, db["revision"], changes)
+        return True
+
+    def changes_since(self, revision: int) -> Tuple[Optional[int], Optional[ChangeSet]]:
+        feed = self._read_feed()
+        if feed is None: return None, None
+        head = int(feed.get("revision", 0))
+        if head <= revision: return head, ChangeSet()
+        entries = self._read_log(feed)
+        return head, merge_feed(revision, [(e["revision"], decode_changes(e.get("changes"))) for e in entries], head)
+
+
+# --- 4. JSONBIN DÉCOUPÉ PAR PILOTE (manifeste + un bin par propriétaire) ---
+
+MANIFEST_FORMAT = "pf-manifest-1"
+
+
+class ShardedJsonBinBackend(JsonBinBackend):
+    """Flotte répartie par `Propriétaire` : un bin par pilote, et un manifeste (bin `bin_id`) qui porte
+    users, user_data, codes, révision et la table pilote -> {bin, révision}. Un lot ne réécrit que les bins
+    des pilotes touchés puis le manifeste ; le chargement lit les bins en parallèle.
+
+    Un `bin_id` contenant encore le document unique est relu tel quel, puis découpé à la première écriture."""
+    name = "jsonbin-sharded"
+
+    def __init__(self, bin_id: str, master_key: str, timeout: float = 10, client: Optional[JsonBinClient] = None,
+                 feed_bin_id: Optional[str] = None, encoding: str = "json", workers: int = 8):
+        super().__init__(bin_id, master_key, timeout, client, feed_bin_id, encoding)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jsonbin-shard")
+        self._lock = threading.Lock()
+        self._shards: Dict[str, dict] = {}      # pilote -> {"bin", "revision"} (dernier manifeste vu)
+        self._owners: Dict[int, str] = {}       # id -> propriétaire, pour retrouver le bin d'une ligne supprimée
+
+    def _load_shard(self, bin_id: str) -> List[dict]:
+        record = self._get(bin_id)
+        return decode_db(record).get("fleet", []) if record else []
+
+    def _remember(self, shards: Dict[str, dict], fleet: List[dict]) -> None:
+        with self._lock:
+            self._shards = dict(shards)
+            self._owners = {row["id"]: row["Propriétaire"] for row in fleet}
+
+    def load(self) -> Dict[str, Any]:
+        record = self._get(self.bin_id)
+        if record is None: raise StorageError(f"JSONBin 404 : bin {self.bin_id} introuvable")
+        try:
+            self._locate_feed(record)
+            if record.get("format") != MANIFEST_FORMAT:
+                db = decode_db(record)
+                self._remember({}, db.get("fleet", []))
+                return db
+            shards = record["shards"]
+            db = {k: v for k, v in record.items() if k not in ("format", "shards")}
+            fleets = self._pool.map(lambda pilot: self._load_shard(shards[pilot]["bin"]), sorted(shards))
+            db["fleet"] = [row for rows in fleets for row in rows]
+        except (ValueError, KeyError) as e:
+            raise StorageError(f"Document JSONBin illisible : {e}") from e
+        self._remember(shards, db["fleet"])
+        return db
+
+    def load_shard(self, pilot: str) -> Optional[List[dict]]:
+        """Lignes d'un seul pilote (un appel si son bin est connu, sinon manifeste + bin) ;
+        None si la DB n'est pas encore découpée."""
+        with self._lock:
+            entry = self._shards.get(pilot)
+        if entry is None:
+            manifest = self._get(self.bin_id) or {}
+            if manifest.get("format") != MANIFEST_FORMAT: return None
+            entry = manifest["shards"].get(pilot)
+        return self._load_shard(entry["bin"]) if entry else []
+
+    def _put_shard(self, entry: Optional[dict], rows: List[dict], revision: int) -> Optional[dict]:
+        """Écrit le bin d'un pilote (créé au besoin, supprimé s'il n'a plus de lignes) ; entrée du manifeste."""
+        if not rows:
+            if entry: self.client.request("DELETE", f"/b/{entry['bin']}")
+            return None
+        doc = {"fleet": rows, "revision": revision}
+        if entry:
+            response = self._send("PUT", f"/b/{entry['bin']}", doc)
+            bin_id = entry["bin"]
+        else:
+            response = self._send("POST", "/b", doc)
+            bin_id = response.json().get("metadata", {}).get("id") if response.status_code == 200 else None
+        if response.status_code not in (200, 204) or not bin_id:
+            raise StorageError(f"JSONBin {response.status_code} : {response.text[:200]}")
+        return {"bin": bin_id, "revision": revision}
+
+    def _write(self, db: Dict[str, Any], changes: Optional[ChangeSet]) -> bool:
+        feed = self._read_feed()
+        # Manifeste relu juste avant l'écriture : bins créés et comptes modifiés par les autres processus conservés
+        current = self._get(self.bin_id) or {}
+        if feed is None: feed = self._open_feed(current)
+        split = current.get("format") == MANIFEST_FORMAT
+        shards = dict(current.get("shards", {})) if split else {}
+        head = max(doc_revision(current), feed["revision"] if feed else 0)
+        if changes is not None and head > doc_revision(db): raise ConflictError(doc_revision(db), head)
+        revision = max(doc_revision(db), head) + 1
+        db["revision"] = revision
+
+        by_owner: Dict[str, List[dict]] = {}
+        for row in db.get("fleet", []):
+            by_owner.setdefault(row["Propriétaire"], []).append(row)
+        if changes is None or not split:
+            touched = set(by_owner) | set(shards)
+        else:
+            with self._lock:
+                touched = {self._owners[i] for i in (changes.deletes | set(changes.upserts)) if i in self._owners}
+            touched |= {row["Propriétaire"] for row in changes.upserts.values()}
+            touched |= {pilot for pilot, pin in changes.users.items() if pin is None}
+        pilots = sorted(touched)
+        entries = self._pool.map(lambda p: self._put_shard(shards.get(p), by_owner.get(p, []), revision), pilots)
+        for pilot, entry in zip(pilots, list(entries)):
+            if entry is None: shards.pop(pilot, None)
+            else: shards[pilot] = entry
+
+        if changes is None or not split:
+            manifest = {k: v for k, v in db.items() if k != "fleet"}
+        else:
+            # Seuls les comptes et codes du lot s'appliquent au manifeste relu
+            accounts = ChangeSet()
+            accounts.users, accounts.user_data, accounts.meta = changes.users, changes.user_data, changes.meta
+            manifest = apply_changes({k: v for k, v in current.items() if k not in ("format", "shards")}, accounts)
+        manifest.update({"format": MANIFEST_FORMAT, "revision": revision, "shards": shards})
+        if self.feed_bin_id: manifest["feed"] = self.feed_bin_id
+        response = self.client.request("PUT", f"/b/{self.bin_id}", manifest)
+        if response.status_code == 403: raise StorageSizeLimitError(response.text)
+        if response.status_code not in (200, 204): return False
+        self._remember(shards, db.get("fleet", []))
+        self._publish(feed, revision, changes)
+        return True
+
+
+# --- 5. SQLITE (WAL, une ligne par vaisseau) ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fleet (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    row TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fleet_owner ON fleet(owner);
+CREATE TABLE IF NOT EXISTS users (pilot TEXT PRIMARY KEY, pin TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS user_data (pilot TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS changelog (revision INTEGER PRIMARY KEY, changes TEXT);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str = "pioneer_fleet.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            cur = self._conn.cursor()
+            db = empty_db()
+            db["user_data"] = {}
+            for key, value in cur.execute("SELECT key, value FROM meta"):
+                db[key] = json.loads(value)
+            db["users"] = dict(cur.execute("SELECT pilot, pin FROM users"))
+            for pilot, data in cur.execute("SELECT pilot, data FROM user_data"):
+                db["user_data"][pilot] = json.loads(data)
+            db["fleet"] = [json.loads(row) for (row,) in cur.execute("SELECT row FROM fleet ORDER BY rowid")]
+            db["revision"] = self._head(cur)
+        return db
+
+    @staticmethod
+    def _head(cur) -> int:
+        return cur.execute("SELECT COALESCE(MAX(revision), 0) FROM changelog").fetchone()[0]
+
+    def _log(self, cur, db: Dict[str, Any], changes: Optional[ChangeSet]) -> None:
+        """Entrée du flux (None = sauvegarde complète) dans la même transaction que l'écriture."""
+        revision = self._head(cur) + 1
+        cur.execute("INSERT INTO changelog VALUES (?, ?)", (revision, json.dumps(changes.to_dict()) if changes is not None else None))
+        cur.execute("DELETE FROM changelog WHERE revision <= ?", (revision - FEED_LENGTH,))
+        db["revision"] = revision
+
+    def save(self, db: Dict[str, Any]) -> bool:
+        """Réécrit toutes les tables (import initial ou restauration)."""
+        with self._lock, self._conn:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            for table in ("fleet", "users", "user_data", "meta"):
+                cur.execute(f"DELETE FROM {table}")
+            cur.executemany("INSERT INTO meta VALUES (?, ?)",
+                            [(k, json.dumps(v)) for k, v in db.items() if k not in ("users", "fleet", "user_data", "revision")])
+            cur.executemany("INSERT INTO users VALUES (?, ?)", list(db.get("users", {}).items()))
+            cur.executemany("INSERT INTO user_data VALUES (?, ?)",
+                            [(p, json.dumps(d)) for p, d in db.get("user_data", {}).items()])
+            cur.executemany("INSERT INTO fleet VALUES (?, ?, ?)",
+                            [(s["id"], s["Propriétaire"], json.dumps(s)) for s in db.get("fleet", [])])
+            self._log(cur, db, None)
+        return True
+
+    def commit(self, db: Dict[str, Any], changes: ChangeSet) -> bool:
+        with self._lock, self._conn:
+            cur = self._conn.cursor()
+            # Verrou d'écriture pris avant de lire la révision : contrôle et écriture atomiques entre processus
+            cur.execute("BEGIN IMMEDIATE")
+            head = self._head(cur)
+            if head > doc_revision(db): raise ConflictError(doc_revision(db), head)
+            if changes.deletes:
+                cur.executemany("DELETE FROM fleet WHERE id = ?", [(i,) for i in changes.deletes])
+            if changes.upserts:
+                cur.executemany("INSERT OR REPLACE INTO fleet VALUES (?, ?, ?)",
+                                [(s["id"], s["Propriétaire"], json.dumps(s)) for s in changes.upserts.values()])
+            for pilot, pin in changes.users.items():
+                if pin is None: cur.execute("DELETE FROM users WHERE pilot = ?", (pilot,))
+                else: cur.execute("INSERT OR REPLACE INTO users VALUES (?, ?)", (pilot, pin))
+            for pilot, data in changes.user_data.items():
+                if data is None: cur.execute("DELETE FROM user_data WHERE pilot = ?", (pilot,))
+                else: cur.execute("INSERT OR REPLACE INTO user_data VALUES (?, ?)", (pilot, json.dumps(data)))
+            for key, value in changes.meta.items():
+                cur.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+            self._log(cur, db, changes)
+        return True
+
+    def changes_since(self, revision: int) -> Tuple[Optional[int], Optional[ChangeSet]]:
+        with self._lock:
+            cur = self._conn.cursor()
+            head = self._head(cur)
+            if head <= revision: return head, ChangeSet()
+            rows = cur.execute("SELECT revision, changes FROM changelog WHERE revision > ? ORDER BY revision", (revision,)).fetchall()
+        return head, merge_feed(revision, [(rev, json.loads(data) if data is not None else None) for rev, data in rows], head)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT NOT EXISTS (SELECT 1 FROM users) AND NOT EXISTS (SELECT 1 FROM fleet)").fetchone()[0] == 1
+
+
+def make_backend(kind: str, **options) -> StorageBackend:
+    """Instancie le backend demandé ("jsonbin", "jsonbin-sharded" ou "sqlite")."""
+    if kind == "sqlite":
+        return SQLiteBackend(options.get("path") or "pioneer_fleet.db")
+    workers = options.get("workers") or (8 if kind == "jsonbin-sharded" else 4)
+    client = options.get("client") or JsonBinClient(options["master_key"], base_url=options.get("base_url") or JSONBIN_URL,
+                                                     gzip_requests=options.get("gzip", False), pool_size=workers)
+    if kind == "jsonbin-sharded":
+        return ShardedJsonBinBackend(options["bin_id"], options["master_key"], client=client,
+                                     feed_bin_id=options.get("feed_bin_id"), encoding=options.get("encoding") or "json",
+                                     workers=workers)
+    return JsonBinBackend(options["bin_id"], options["master_key"], client=client, feed_bin_id=options.get("feed_bin_id"),
+                          encoding=options.get("encoding") or "json")
@@ -0,0 +1,50 @@
+# synthetic_fleet.py
+"""DB synthétiques reproductibles (benchmarks et serveur JSONBin local)."""
+import random
+from typing import Dict, Any
+
+from migrations import SCHEMA_VERSION
+from ships_data import SHIPS_DB
+from storage import DEFAULT_META
+
+INSURANCES = ["LTI", "10 Ans", "2 ans", "6 Mois", "2 Mois", "Standard"]
+
+
+def make_synthetic_db(n_ships: int, n_pilots: int = None, need_crew_ratio: float = 0.05, seed: int = 1) -> Dict[str, Any]:
+    """DB au format de l'application : `n_ships` lignes de flotte réparties sur `n_pilots` pilotes,
+    dont une part `need_crew_ratio` cherche un équipage (avec des inscrits tirés parmi les pilotes)."""
+    rnd = random.Random(seed)
+    n_pilots = n_pilots or max(3, n_ships // 40)
+    pilots = [f"pilote{i:04d}" for i in range(n_pilots)]
+    names = list(SHIPS_DB)
+    fleet = []
+    for i in range(n_ships):
+        name = rnd.choice(names)
+        info = SHIPS_DB[name]
+        source = rnd.choice(["STORE", "INGAME"])
+        need_crew = rnd.random() < need_crew_ratio
+        fleet.append({
+            "id": 1_700_000_000_000_000 + i,
+            "Propriétaire": rnd.choice(pilots),
+            "Vaisseau": name,
+            "Marque": info.get("brand", "N/A"),
+            "Rôle": info.get("role", "Inconnu"),
+            "FlightReady": rnd.random() < 0.5,
+            "NeedCrew": need_crew,
+            "CrewList": rnd.sample(pilots, min(len(pilots), rnd.randint(0, 2))) if need_crew else [],
+            "Image": info.get("img", ""),
+            "Visuel": "",
+            "Source": source,
+            "Prix_USD": float(info.get("price", 0) or 0),
+            "Prix_aUEC": float(info["auec_price"]) if isinstance(info.get("auec_price"), (int, float)) else 0.0,
+            "Assurance": rnd.choice(INSURANCES),
+            "Prix": None,
+            "crew_max": info.get("crew_max", 1),
+        })
+    return {
+        **DEFAULT_META,
+        "schema_version": SCHEMA_VERSION,
+        "users": {p: f"{rnd.randint(0, 9999):04d}" for p in pilots},
+        "user_data": {p: {"auec_balance": rnd.randint(0, 50) * 100_000, "acquisition_target": None} for p in pilots},
+        "fleet": fleet,
+    }
@@ -0,0 +1,6 @@
+# conftest.py
+"""Modules de l'application (dépôt à plat) importables depuis tests/."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
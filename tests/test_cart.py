@@ -0,0 +1,39 @@
+# test_cart.py
+"""Panier : multiset (vaisseau, source, assurance) avec totaux par vaisseau."""
+from cart import Cart
+
+
+def test_counts_by_name_and_key():
+    cart = Cart()
+    cart.add("Aurora MR", "STORE", "LTI")
+    cart.add("Aurora MR", "INGAME", "Standard", qty=2)
+    cart.add("Carrack", "STORE", "LTI")
+    assert len(cart) == 4 and cart.count("Aurora MR") == 3
+    assert cart.qty(("Aurora MR", "INGAME", "Standard")) == 2
+    assert dict(cart.items()) == {("Aurora MR", "STORE", "LTI"): 1, ("Aurora MR", "INGAME", "Standard"): 2,
+                                  ("Carrack", "STORE", "LTI"): 1}
+
+
+def test_remove_one_takes_oldest_line():
+    cart = Cart()
+    cart.add("Aurora MR", "STORE", "LTI")
+    cart.add("Aurora MR", "INGAME", "Standard")
+    assert cart.remove_one("Aurora MR")
+    assert cart.qty(("Aurora MR", "STORE", "LTI")) == 0 and cart.count("Aurora MR") == 1
+    assert cart.remove_one("Aurora MR") and not cart.remove_one("Aurora MR")
+    assert not cart and len(cart) == 0
+
+
+def test_set_qty_zero_and_negative():
+    cart = Cart()
+    key = ("Carrack", "STORE", "LTI")
+    cart.set_qty(key, 3)
+    cart.set_qty(key, -1)
+    assert cart.qty(key) == 0 and cart.count("Carrack") == 0 and list(cart.items()) == []
+
+
+def test_from_items_and_clear():
+    cart = Cart.from_items([{"name": "Carrack", "source": "STORE", "insurance": "LTI"}] * 2)
+    assert cart.count("Carrack") == 2
+    cart.clear()
+    assert len(cart) == 0 and cart.count("Carrack") == 0
@@ -0,0 +1,45 @@
+# test_catalog.py
+"""Index du catalogue : facettes, plages de caractéristiques et tris."""
+import pytest
+
+from catalog import CatalogIndex
+
+SHIPS = {
+    "Aurora MR": {"brand": "RSI", "role": "Starter", "Cargocapacity": "3", "price": 25},
+    "Cutlass Black": {"brand": "Drake", "role": "Combat", "Cargocapacity": "46", "price": 110},
+    "Caterpillar": {"brand": "Drake", "role": "Cargo", "Cargocapacity": "576", "price": 295},
+    "Carrack": {"brand": "Anvil", "role": "Exploration", "Cargocapacity": "456", "price": 600},
+    "Prototype": {"brand": "Anvil", "role": "Combat", "Cargocapacity": "-", "price": "TBD"},
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CatalogIndex(SHIPS)
+
+
+def test_bounds_ignore_unknown_values(index):
+    assert index.bounds("cargo") == (3.0, 576.0)
+    assert index.bounds("speed") is None
+
+
+def test_in_range_inclusive(index):
+    assert index.in_range("cargo", 46, 456) == {"Cutlass Black", "Carrack"}
+    assert index.in_range("cargo", 47, 455) == frozenset()
+    assert index.in_range("price", 0, 10_000) == {"Aurora MR", "Cutlass Black", "Caterpillar", "Carrack"}
+
+
+def test_filter_combines_facets_and_ranges(index):
+    assert index.filter(brand="Drake") == ["Cutlass Black", "Caterpillar"]
+    assert index.filter(brand="Drake", ranges={"cargo": (100, 1000)}) == ["Caterpillar"]
+    assert index.filter(role="Combat", names=["Prototype", "Aurora MR"]) == ["Prototype"]
+
+
+def test_sort_puts_unknown_values_last(index):
+    assert index.filter(sort="cargo") == ["Aurora MR", "Cutlass Black", "Carrack", "Caterpillar", "Prototype"]
+    assert index.filter(sort="cargo", descending=True) == ["Caterpillar", "Carrack", "Cutlass Black", "Aurora MR",
+                                                           "Prototype"]
+
+
+def test_counts(index):
+    assert index.counts("brand", role="Combat") == {"Anvil": 1, "Drake": 1, "RSI": 0}
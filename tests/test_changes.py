@@ -0,0 +1,78 @@
+# test_changes.py
+"""Lots de modifications : fusion, sérialisation, application au document et flux."""
+import json
+
+import pytest
+
+import storage
+from storage import ChangeSet, apply_changes, merge_feed, trim_feed
+
+
+def ship(ship_id, **fields):
+    return {"id": ship_id, "Propriétaire": "alice", "Vaisseau": "Aurora MR", "CrewList": [], **fields}
+
+
+def test_last_write_wins():
+    changes = ChangeSet().upsert_ship(ship(1)).delete_ship(2)
+    changes.merge(ChangeSet().delete_ship(1).upsert_ship(ship(2, FlightReady=True)))
+    assert changes.deletes == {1}
+    assert changes.upserts == {2: ship(2, FlightReady=True)}
+
+
+def test_dict_round_trip():
+    changes = ChangeSet().upsert_ship(ship(1)).delete_ship(3).set_user("bob", "0000").delete_user("eve")
+    changes.set_meta("corpo_code", "X")
+    data = json.loads(json.dumps(changes.to_dict()))
+    assert ChangeSet.from_dict(data).to_dict() == changes.to_dict()
+
+
+def test_apply_keeps_order_and_input():
+    db = {"fleet": [ship(1), ship(2), ship(3)], "users": {"alice": "1"}, "user_data": {}}
+    changes = ChangeSet().upsert_ship(ship(2, FlightReady=True)).delete_ship(1).upsert_ship(ship(4))
+    changes.set_user("bob", "2").delete_user("alice")
+    out = apply_changes(db, changes)
+    assert [row["id"] for row in out["fleet"]] == [2, 3, 4]
+    assert out["fleet"][0]["FlightReady"] is True
+    assert out["users"] == {"bob": "2"}
+    assert [row["id"] for row in db["fleet"]] == [1, 2, 3] and db["users"] == {"alice": "1"}
+    assert out["fleet"][1] is db["fleet"][2]            # lignes inchangées partagées
+
+
+def test_apply_empty_returns_same_document():
+    db = {"fleet": [ship(1)]}
+    assert apply_changes(db, ChangeSet()) is db
+
+
+def entry(revision, deleted):
+    return revision, ChangeSet().delete_ship(deleted).to_dict()
+
+
+def test_merge_feed_contiguous():
+    merged = merge_feed(1, [entry(2, 10), entry(3, 11), entry(4, 12)], 4)
+    assert merged.deletes == {10, 11, 12}
+    assert merge_feed(2, [entry(2, 10), entry(3, 11)], 3).deletes == {11}
+
+
+@pytest.mark.parametrize("entries, head", [
+    ([entry(2, 10), entry(4, 12)], 4),                  # trou
+    ([entry(2, 10), entry(3, 11)], 4),                  # tête non journalisée
+    ([entry(2, 10), (3, None)], 3),                     # sauvegarde complète
+    ([entry(5, 10)], 5),                                # journal tronqué après la révision connue
+])
+def test_merge_feed_needs_reload(entries, head):
+    assert merge_feed(1, entries, head) is None
+
+
+def test_trim_feed_bounds(monkeypatch):
+    monkeypatch.setattr(storage, "FEED_LENGTH", 5)
+    entries = [{"revision": r, "changes": ChangeSet().upsert_ship(ship(r)).to_dict()} for r in range(1, 21)]
+    kept = trim_feed(entries)
+    assert [e["revision"] for e in kept] == [16, 17, 18, 19, 20]
+    small = trim_feed(entries, max_bytes=300)
+    assert small and small[-1]["revision"] == 20
+    assert sum(len(json.dumps(e, separators=(",", ":"))) for e in small) <= 300
+
+
+def test_trim_feed_oversized_entry_becomes_full_save():
+    big = {"revision": 9, "changes": ChangeSet().upsert_ship(ship(1, Note="x" * 500)).to_dict()}
+    assert trim_feed([big], max_bytes=100) == [{"revision": 9, "changes": None}]
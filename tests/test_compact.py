@@ -0,0 +1,45 @@
+# test_compact.py
+"""Encodage en colonnes : décodage == original, y compris pour les lignes hors catalogue."""
+import copy
+
+import pytest
+
+from compact import decode_changes, decode_db, encode_changes, encode_db
+from synthetic_fleet import make_synthetic_db
+
+
+@pytest.fixture
+def db():
+    db = make_synthetic_db(200, need_crew_ratio=0.2)
+    fleet = db["fleet"]
+    fleet[0]["Prix_USD"] = 1234.5                       # prix modifié à la main
+    fleet[1]["Vaisseau"] = "Vaisseau inconnu"           # hors catalogue
+    fleet[2]["Note"] = "champ inattendu"
+    fleet[3]["FlightReady"] = None                      # drapeau non booléen
+    fleet[4]["CrewList"] = [fleet[5]["Propriétaire"], "pilote externe"]
+    return db
+
+
+@pytest.mark.parametrize("encoding", ["json", "compact", "packed"])
+def test_round_trip(db, encoding):
+    original = copy.deepcopy(db)
+    assert decode_db(encode_db(db, encoding)) == original
+    assert db == original                               # entrée non modifiée
+
+
+def test_packed_keeps_revision_and_feed_readable(db):
+    db.update(revision=7, feed="bin-feed")
+    doc = encode_db(db, "packed")
+    assert (doc["revision"], doc["feed"]) == (7, "bin-feed")
+    assert decode_db(doc)["feed"] == "bin-feed"
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        decode_db({"format": "autre", "fleet": {}})
+
+
+def test_changes_round_trip(db):
+    data = {"upserts": db["fleet"][:5], "deletes": [1, 2], "users": {"a": "1234"}, "user_data": {}, "meta": {}}
+    assert decode_changes(encode_changes(copy.deepcopy(data))) == data
+    assert encode_changes(None) is None
@@ -0,0 +1,84 @@
+# test_fleet_repo.py
+"""Dépôt de flotte : ordre conservé, dérivation par lot et surcouche identiques à une construction complète."""
+import random
+
+import pandas as pd
+import pytest
+
+import fleet_repo
+from fleet_repo import FleetRepository, build_fleet_frame, group_key
+from storage import ChangeSet, apply_changes
+
+OWNERS = ["alice", "bob", "carol"]
+CREW = ["dan", "eve"]
+
+
+def ship(rnd, ship_id):
+    return {"id": ship_id, "Propriétaire": rnd.choice(OWNERS), "Vaisseau": rnd.choice(["Aurora MR", "Carrack", "Cutlass Black"]),
+            "Marque": "M", "Rôle": "R", "Source": rnd.choice(["STORE", "INGAME"]), "Assurance": "LTI",
+            "FlightReady": rnd.random() < 0.5, "NeedCrew": rnd.random() < 0.3, "CrewList": rnd.sample(CREW, rnd.randint(0, 2)),
+            "Prix_USD": rnd.randint(0, 500), "Prix_aUEC": rnd.randint(0, 9999), "crew_max": 2, "Image": ""}
+
+
+def assert_same(repo, rows):
+    ref = FleetRepository(rows)
+    assert [row["id"] for row in repo.rows] == [row["id"] for row in rows]
+    assert len(repo) == len(rows)
+    for owner in OWNERS: assert repo.ids_for_owner(owner) == ref.ids_for_owner(owner)
+    for member in CREW: assert repo.ids_for_crew(member) == ref.ids_for_crew(member)
+    for row in rows: assert repo.ids_for_group(group_key(row)) == ref.ids_for_group(group_key(row))
+    assert repo.aggregates.verify(rows) == []
+    pd.testing.assert_frame_equal(repo.frame(), build_fleet_frame(rows))
+
+
+def test_remove_keeps_order():
+    rnd = random.Random(0)
+    rows = [ship(rnd, i) for i in range(6)]
+    repo = FleetRepository(list(rows))
+    repo.remove(1)
+    repo.update(3, FlightReady=True)
+    assert [row["id"] for row in repo.rows] == [0, 2, 3, 4, 5]
+
+
+def test_derive_matches_full_build(monkeypatch):
+    monkeypatch.setattr(fleet_repo, "FLATTEN_MIN", 8)       # aplatissements fréquents
+    rnd = random.Random(1)
+    db = {"fleet": [ship(rnd, i) for i in range(50)]}
+    repo = FleetRepository(db["fleet"])
+    repo.frame()
+    next_id = 1000
+    for step in range(120):
+        changes = ChangeSet()
+        ids = [row["id"] for row in db["fleet"]]
+        for _ in range(rnd.randint(1, 5)):
+            roll = rnd.random()
+            if roll < 0.3 and ids: changes.delete_ship(rnd.choice(ids))
+            elif roll < 0.7 and ids: changes.upsert_ship(ship(rnd, rnd.choice(ids)))
+            else:
+                next_id += 1
+                changes.upsert_ship(ship(rnd, next_id))
+        db = apply_changes(db, changes)
+        repo = repo.derive(changes, db["fleet"] if step % 2 else None)
+        if step % 3 == 0: repo.frame()
+        assert_same(repo, db["fleet"])
+
+
+def test_fork_leaves_parent_untouched():
+    rnd = random.Random(2)
+    rows = [ship(rnd, i) for i in range(20)]
+    parent = FleetRepository(list(rows))
+    parent.frame()
+    child = parent.fork()
+    child.update(0, Propriétaire="carol", CrewList=["dan"])
+    child.remove(5)
+    child.add(ship(rnd, 99))
+    assert_same(parent, rows)
+    expected = [dict(rows[0], Propriétaire="carol", CrewList=["dan"])] + rows[1:5] + rows[6:] + [child.get(99)]
+    assert_same(child, expected)
+
+
+def test_add_existing_id_rejected():
+    rnd = random.Random(3)
+    repo = FleetRepository([ship(rnd, 1)])
+    with pytest.raises(KeyError):
+        repo.add(ship(rnd, 1))
@@ -0,0 +1,63 @@
+# test_merge.py
+"""Fusion à trois voies d'un lot écrit sur une base périmée."""
+from merge import diff_db, merge_members, merge_row, rebase
+from storage import ChangeSet, apply_changes
+
+
+def ship(ship_id, **fields):
+    row = {"id": ship_id, "Propriétaire": "alice", "Vaisseau": "Cutlass Black", "Assurance": "LTI",
+           "FlightReady": False, "NeedCrew": True, "CrewList": [], "crew_max": 3}
+    row.update(fields)
+    return row
+
+
+def test_merge_members_both_sides():
+    assert merge_members(["a", "b"], ["a", "c"], ["a", "b", "d"]) == ["a", "d", "c"]
+
+
+def test_merge_members_respects_limit():
+    assert merge_members([], ["x", "y"], ["a", "b"], limit=3) == ["a", "b", "x"]
+
+
+def test_merge_row_field_by_field():
+    base = ship(1)
+    ours = dict(base, FlightReady=True)
+    theirs = dict(base, Assurance="10 Ans")
+    assert merge_row(base, ours, theirs) == dict(base, FlightReady=True, Assurance="10 Ans")
+
+
+def test_merge_row_same_field_ours_wins():
+    base = ship(1)
+    assert merge_row(base, dict(base, Assurance="6 Mois"), dict(base, Assurance="2 ans"))["Assurance"] == "6 Mois"
+
+
+def test_rebase_conflicting_edits():
+    base = {"fleet": [ship(1), ship(2), ship(3)], "users": {}, "user_data": {"alice": {"auec_balance": 10}}}
+    theirs = (ChangeSet().upsert_ship(ship(1, Assurance="10 Ans", CrewList=["bob"])).delete_ship(2)
+              .set_user_data("alice", {"auec_balance": 10, "acquisition_target": "Carrack"}))
+    ours = (ChangeSet().upsert_ship(ship(1, FlightReady=True, CrewList=["eve"])).upsert_ship(ship(2, FlightReady=True))
+            .upsert_ship(ship(4)).set_user_data("alice", {"auec_balance": 50}))
+    rebased = rebase(ours, base, theirs)
+
+    merged = apply_changes(apply_changes(base, theirs), rebased)
+    rows = {row["id"]: row for row in merged["fleet"]}
+    assert rows[1]["Assurance"] == "10 Ans" and rows[1]["FlightReady"] is True
+    assert rows[1]["CrewList"] == ["bob", "eve"]
+    assert 2 not in rows                                # supprimée ailleurs : reste supprimée
+    assert 4 in rows
+    assert merged["user_data"]["alice"] == {"auec_balance": 50, "acquisition_target": "Carrack"}
+
+
+def test_rebase_keeps_our_delete():
+    base = {"fleet": [ship(1)]}
+    rebased = rebase(ChangeSet().delete_ship(1), base, ChangeSet().upsert_ship(ship(1, FlightReady=True)))
+    assert rebased.deletes == {1}
+
+
+def test_diff_db_round_trip():
+    base = {"fleet": [ship(1), ship(2)], "users": {"alice": "1"}, "user_data": {}, "corpo_code": "A", "revision": 3}
+    latest = {"fleet": [ship(2, FlightReady=True), ship(5)], "users": {"alice": "1", "bob": "2"}, "user_data": {},
+              "corpo_code": "B", "revision": 5}
+    changes = diff_db(base, latest)
+    assert changes.deletes == {1} and set(changes.upserts) == {2, 5}
+    assert apply_changes(base, changes) == {**latest, "revision": 3}
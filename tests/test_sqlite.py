@@ -0,0 +1,64 @@
+# test_sqlite.py
+"""Backend SQLite : contrôle de conflit transactionnel et flux de modifications."""
+import pytest
+
+import storage
+from storage import ChangeSet, ConflictError, SQLiteBackend, apply_changes
+
+
+def ship(ship_id, **fields):
+    return {"id": ship_id, "Propriétaire": "alice", "Vaisseau": "Aurora MR", "CrewList": [], **fields}
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "fleet.db"))
+    backend.save({"fleet": [ship(1), ship(2)], "users": {"alice": "1234"}, "user_data": {}, "corpo_code": "A"})
+    return backend
+
+
+def commit(backend, db, changes):
+    db = apply_changes(db, changes)
+    backend.commit(db, changes)
+    return db
+
+
+def test_load_round_trip(backend):
+    db = backend.load()
+    assert [row["id"] for row in db["fleet"]] == [1, 2]
+    assert db["users"] == {"alice": "1234"} and db["corpo_code"] == "A" and db["revision"] == 1
+
+
+def test_stale_commit_conflicts(backend):
+    mine, theirs = backend.load(), backend.load()
+    commit(backend, theirs, ChangeSet().upsert_ship(ship(1, FlightReady=True)))
+    with pytest.raises(ConflictError) as error:
+        commit(backend, mine, ChangeSet().delete_ship(2))
+    assert (error.value.base, error.value.head) == (1, 2)
+    assert [row["id"] for row in backend.load()["fleet"]] == [1, 2]    # rien d'écrit
+
+
+def test_changes_since(backend):
+    db = backend.load()
+    db = commit(backend, db, ChangeSet().upsert_ship(ship(3)))
+    commit(backend, db, ChangeSet().delete_ship(1))
+    head, changes = backend.changes_since(1)
+    assert head == 3
+    assert set(changes.upserts) == {3} and changes.deletes == {1}
+    head, changes = backend.changes_since(3)
+    assert head == 3 and not changes
+
+
+def test_changes_since_gap_needs_reload(backend, monkeypatch):
+    monkeypatch.setattr(storage, "FEED_LENGTH", 2)
+    db = backend.load()
+    for ship_id in (3, 4, 5):
+        db = commit(backend, db, ChangeSet().upsert_ship(ship(ship_id)))
+    assert backend.changes_since(1) == (4, None)        # révision 2 sortie du journal
+    assert set(backend.changes_since(3)[1].upserts) == {5}
+
+
+def test_full_save_in_feed_needs_reload(backend):
+    db = backend.load()
+    backend.save(db)
+    assert backend.changes_since(1) == (2, None)